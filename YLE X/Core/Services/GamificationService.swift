@@ -46,11 +46,19 @@ class GamificationService: ObservableObject {
                 missionProgress: [:],
                 petId: nil
             )
-            try userLevelRef.setData(from: newLevel)
+            try saveUserLevel(newLevel, userId: userId)
             userLevel = newLevel
         }
     }
 
+    /// Writes the whole level document and stamps lastUpdated, which the
+    /// leaderboard jobs use to find changed users
+    private func saveUserLevel(_ level: UserLevel, userId: String) throws {
+        var data = try Firestore.Encoder().encode(level)
+        data["lastUpdated"] = FieldValue.serverTimestamp()
+        db.collection("userLevels").document(userId).setData(data)
+    }
+
     func addXP(_ amount: Int) async throws {
         guard let userId = Auth.auth().currentUser?.uid,
               var level = userLevel else { return }
@@ -63,7 +71,7 @@ class GamificationService: ObservableObject {
             level.currentLevel += 1
         }
 
-        try db.collection("userLevels").document(userId).setData(from: level)
+        try saveUserLevel(level, userId: userId)
         self.userLevel = level
 
         // Haptic feedback for level up
@@ -103,7 +111,8 @@ class GamificationService: ObservableObject {
         }
 
         try await db.collection("userLevels").document(userId).updateData([
-            "badgesUnlocked": level.badgesUnlocked
+            "badgesUnlocked": level.badgesUnlocked,
+            "lastUpdated": FieldValue.serverTimestamp()
         ])
     }
 
@@ -159,7 +168,7 @@ class GamificationService: ObservableObject {
             level.missionProgress[missionId] = progress
         }
 
-        try db.collection("userLevels").document(userId).setData(from: level)
+        try saveUserLevel(level, userId: userId)
         self.userLevel = level
     }
 
@@ -347,22 +347,10 @@ class LeaderboardService: ObservableObject {
         listeners.removeAll()
     }
 
-    // MARK: - Weekly Reset (Cloud Function would handle this)
+    // MARK: - Weekly Reset
 
-    func resetWeeklyXP() async throws {
-        // This would typically be called by a Cloud Function on schedule
-        // For testing purposes, we can manually reset
-
-        let batch = db.batch()
-        let snapshot = try await db.collection("userLevels").getDocuments()
-
-        for document in snapshot.documents {
-            let ref = db.collection("userLevels").document(document.documentID)
-            batch.updateData(["weeklyXP": 0], forDocument: ref)
-        }
-
-        try await batch.commit()
-    }
+    // weeklyXP is reset server-side by reset_weekly_xp.py, which pages through
+    // userLevels in batches of 500; a client-side reset can't scale past that
 
     deinit {
         listeners.forEach { $0.remove() }
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Materialized Friends Leaderboards (friendships + userLevels → friendsLeaderboards)
+
+LeaderboardService.fetchFriendsLeaderboard() lists friendships/{uid}/friends
+and then reads userLevels/{friendId} one friend at a time (N+1 round trips
+per screen). This job writes one pre-sorted document per user instead:
+
+    friendsLeaderboards/{uid}
+        entries: [{id, username, avatar, rank, xp, level, streakDays, badgeCount}]
+
+Entries are sorted by totalXP and include the user themselves, exactly like
+the app builds them today, so the client needs a single read.
+
+How it stays incremental:
+- The friend graph is read in bulk with one collection group query on
+  'friends' (document names only)
+- Only userLevels whose lastUpdated is newer than the previous run are
+  read; a user is refreshed if they, or one of their friends, changed, or
+  if their friend list changed. The app stamps lastUpdated on every write;
+  if any profile lacks it, the run reads every profile instead
+- Other profiles those boards need are fetched with batched get_all()
+- A board is only rewritten if its content hash differs from the last run
+
+Usage:
+    python3 build_friends_leaderboards.py
+
+    # Against the local emulator
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python3 build_friends_leaderboards.py
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from firebase_admin import firestore
+from migrate_perfect_to_firebase import BATCH_LIMIT, commit_batch, count_missing_field, initialize_firebase, iter_pages
+
+# Configuration
+MODE = 'incremental'  # 'incremental' or 'full' (ignore previous state, rebuild all)
+USER_COLLECTION = 'userLevels'
+FRIENDS_COLLECTION = 'friends'  # friendships/{uid}/friends/{friendId}
+BOARD_COLLECTION = 'friendsLeaderboards'
+STATE_FILE = 'friends_leaderboards_state.json'  # Cursor + hashes from the previous run
+PAGE_SIZE = 2000
+GET_ALL_CHUNK = 300  # Profiles per batched read
+MAX_ENTRIES = 500  # Keeps the largest boards well under the 1 MB document limit
+WORKERS = 8
+DRY_RUN = True  # Set to False to write
+
+# userLevels fields a board needs (same as LeaderboardEntry)
+PROFILE_FIELDS = ['username', 'avatar', 'totalXP', 'currentLevel', 'streakDays', 'badgesUnlocked']
+
+
+def digest(value):
+    """Short content hash used to detect changed friend lists and boards"""
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def to_profile(data):
+    """Compact profile tuple: (username, avatar, xp, level, streakDays, badgeCount)"""
+    return (
+        data.get('username', 'User'),
+        data.get('avatar', '👤'),
+        data.get('totalXP') or 0,
+        data.get('currentLevel', 1),
+        data.get('streakDays', 0),
+        len(data.get('badgesUnlocked') or [])
+    )
+
+
+def fetch_friend_graph(db):
+    """Read every friendships/{uid}/friends/{friendId} name: {uid: [friendId, ...]}"""
+    graph = {}
+    query = db.collection_group(FRIENDS_COLLECTION).order_by(firestore.FieldPath.document_id())
+    edges = 0
+
+    for page in iter_pages(query, [], PAGE_SIZE):
+        for doc in page:
+            owner = doc.reference.parent.parent
+            if owner is None or owner.parent.id != 'friendships':
+                continue
+            graph.setdefault(sys.intern(owner.id), []).append(sys.intern(doc.id))
+        edges += len(page)
+        print(f"   Read {edges} friendships...")
+
+    return graph
+
+
+def fetch_profiles(db, cursor):
+    """Stream userLevels (all, or changed since cursor): ({uid: profile}, new cursor)"""
+    query = db.collection(USER_COLLECTION)
+    if cursor is None:
+        query = query.order_by(firestore.FieldPath.document_id())
+    else:
+        query = (query.where(filter=firestore.FieldFilter('lastUpdated', '>', cursor))
+                 .order_by('lastUpdated'))
+
+    profiles = {}
+    for page in iter_pages(query, PROFILE_FIELDS + ['lastUpdated'], PAGE_SIZE):
+        for doc in page:
+            data = doc.to_dict()
+            profiles[sys.intern(doc.id)] = to_profile(data)
+            if data.get('lastUpdated') and (cursor is None or data['lastUpdated'] > cursor):
+                cursor = data['lastUpdated']
+
+    return profiles, cursor
+
+
+def fetch_missing_profiles(db, user_ids, profiles):
+    """Batched get_all() for profiles a board needs but the change query didn't return"""
+    missing = [user_id for user_id in user_ids if user_id not in profiles]
+    chunks = [missing[i:i + GET_ALL_CHUNK] for i in range(0, len(missing), GET_ALL_CHUNK)]
+
+    def read_chunk(chunk):
+        refs = [db.collection(USER_COLLECTION).document(user_id) for user_id in chunk]
+        return [(doc.id, doc.to_dict()) for doc in db.get_all(refs, field_paths=PROFILE_FIELDS)]
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        for docs in executor.map(read_chunk, chunks):
+            for user_id, data in docs:
+                if data is not None:
+                    profiles[sys.intern(user_id)] = to_profile(data)
+
+    return len(missing)
+
+
+def build_board(user_id, friend_ids, profiles):
+    """Sorted entries for one user (same ordering as fetchFriendsLeaderboard)"""
+    members = [uid for uid in set(friend_ids) | {user_id} if uid in profiles]
+    members.sort(key=lambda uid: (-profiles[uid][2], uid))
+
+    # Always keep the user's own entry, even on very large boards
+    ranked = list(enumerate(members, 1))
+    if len(ranked) > MAX_ENTRIES:
+        own = [item for item in ranked[MAX_ENTRIES:] if item[1] == user_id]
+        ranked = ranked[:MAX_ENTRIES - len(own)] + own
+
+    entries = []
+    for rank, uid in ranked:
+        username, avatar, xp, level, streak_days, badge_count = profiles[uid]
+        entries.append({
+            'id': uid,
+            'username': username,
+            'avatar': avatar,
+            'rank': rank,
+            'xp': xp,
+            'level': level,
+            'streakDays': streak_days,
+            'badgeCount': badge_count
+        })
+
+    return entries
+
+
+def load_state():
+    """{'cursor': datetime | None, 'users': {uid: [friendsHash, boardHash]}}"""
+    if MODE == 'full' or not os.path.exists(STATE_FILE):
+        return {'cursor': None, 'users': {}}
+
+    with open(STATE_FILE, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    state['cursor'] = datetime.fromisoformat(state['cursor']) if state['cursor'] else None
+    return state
+
+
+def save_state(state):
+    with open(STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'cursor': state['cursor'].isoformat() if state['cursor'] else None,
+            'users': state['users']
+        }, f)
+
+
+def refresh_boards(db):
+    """Rebuild the boards affected since the last run and write the changed ones"""
+    state = load_state()
+
+    if state['cursor'] is not None:
+        missing, total = count_missing_field(db.collection(USER_COLLECTION), 'lastUpdated')
+        if missing:
+            print(f"\n⚠️  {missing} of {total} users have no lastUpdated, so their changes can't be "
+                  f"tracked incrementally; reading every profile")
+            state['cursor'] = None
+
+    incremental = state['cursor'] is not None
+    print(f"\n👥 Building friends leaderboards ({'incremental' if incremental else 'full'})...")
+    print(f"   Mode: {'DRY RUN' if DRY_RUN else 'LIVE'}")
+
+    start = time.time()
+    graph = fetch_friend_graph(db)
+    profiles, cursor = fetch_profiles(db, state['cursor'])
+    print(f"   Users with friends: {len(graph)}")
+    print(f"   {'Changed' if incremental else 'Read'} profiles: {len(profiles)}")
+
+    friends_hashes = {user_id: digest(sorted(friend_ids)) for user_id, friend_ids in graph.items()}
+
+    if incremental:
+        changed = profiles.keys()
+        candidates = [
+            user_id for user_id, friend_ids in graph.items()
+            if user_id in changed
+            or state['users'].get(user_id, [None])[0] != friends_hashes[user_id]
+            or any(friend_id in changed for friend_id in friend_ids)
+        ]
+        needed = {uid for user_id in candidates for uid in graph[user_id]} | set(candidates)
+        fetched = fetch_missing_profiles(db, needed, profiles)
+        print(f"   Affected users: {len(candidates)} (fetched {fetched} more profiles)")
+    else:
+        candidates = list(graph)
+
+    users = {user_id: hashes for user_id, hashes in state['users'].items() if user_id in graph}
+    writes = []
+    for user_id in candidates:
+        entries = build_board(user_id, graph[user_id], profiles)
+        board_hash = digest(entries)
+
+        if users.get(user_id, [None, None])[1] != board_hash:
+            ref = db.collection(BOARD_COLLECTION).document(user_id)
+            writes.append(('set', ref, {
+                'userId': user_id,
+                'entries': entries,
+                'updatedAt': datetime.now().isoformat()
+            }))
+        users[user_id] = [friends_hashes[user_id], board_hash]
+
+    # Users who no longer have any friends
+    removed = [user_id for user_id in state['users'] if user_id not in graph]
+    writes += [('delete', db.collection(BOARD_COLLECTION).document(user_id), None) for user_id in removed]
+
+    if not DRY_RUN:
+        with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+            chunks = [writes[i:i + BATCH_LIMIT] for i in range(0, len(writes), BATCH_LIMIT)]
+            list(executor.map(lambda chunk: commit_batch(db, chunk), chunks))
+        save_state({'cursor': cursor, 'users': users})
+
+    elapsed = time.time() - start
+
+    print(f"\n{'='*70}")
+    print(f"📊 Friends Leaderboards Summary:")
+    print(f"   👥 Boards checked:    {len(candidates)}")
+    print(f"   ✍️  Boards rewritten:  {len(writes) - len(removed)}{' (dry run)' if DRY_RUN else ''}")
+    print(f"   🗑️  Boards removed:    {len(removed)}{' (dry run)' if DRY_RUN else ''}")
+    print(f"   ⏭️  Unchanged:         {len(candidates) - (len(writes) - len(removed))}")
+    print(f"   ⏱️  {elapsed:.1f}s")
+    print(f"{'='*70}\n")
+
+
+def main():
+    """Main function"""
+    print("="*70)
+    print("👥 Friends Leaderboards: friendships + userLevels → friendsLeaderboards")
+    print("="*70)
+
+    db = initialize_firebase()
+    if not db:
+        return
+
+    refresh_boards(db)
+
+    print("✅ Friends leaderboards complete!\n")
+
+
+if __name__ == '__main__':
+    main()
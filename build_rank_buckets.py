@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Leaderboard Rank Buckets (userLevels → leaderboardStats)
+
+LeaderboardService.fetchUserRank() counts every user with more XP on the
+device, so each profile view costs O(users) reads. This job publishes two
+small documents instead:
+
+    leaderboardStats/weekly    (weeklyXP)
+    leaderboardStats/allTime   (totalXP)
+
+Each holds an XP histogram (bucket edges, counts, users above each bucket)
+and the exact top-N. A client gets its rank with a single read:
+- In the top-N list → exact rank
+- Otherwise → 1 + above[b] + interpolated position inside bucket b
+  (see estimate_rank() below)
+
+Modes:
+- 'full':        stream all of userLevels (field mask: XP fields only)
+- 'incremental': only read documents whose lastUpdated is newer than the
+                 previous run, and merge them into the per-user XP snapshot
+                 kept in STATE_FILE. The app and reset_weekly_xp.py stamp
+                 lastUpdated on every write; if any document lacks it (never
+                 stamped, or rewritten by an older app build) this falls back
+                 to a full scan. Run 'full' from time to time to pick up
+                 deleted users.
+- 'benchmark':   build and query buckets for BENCHMARK_USERS synthetic users
+
+Usage:
+    python3 build_rank_buckets.py
+
+    # Against the local emulator
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python3 build_rank_buckets.py
+"""
+
+import os
+import time
+from datetime import datetime
+import numpy as np
+from firebase_admin import firestore
+from migrate_perfect_to_firebase import count_missing_field, initialize_firebase, iter_pages
+
+# Configuration
+MODE = 'full'  # 'full', 'incremental' or 'benchmark'
+COLLECTION = 'userLevels'
+STATS_COLLECTION = 'leaderboardStats'
+STATE_FILE = 'rank_buckets_state.npz'  # Per-user XP snapshot for incremental runs
+PAGE_SIZE = 2000
+TOP_N = 100  # Exact ranks (matches the app's leaderboard)
+BENCHMARK_USERS = 1_000_000
+DRY_RUN = True  # Set to False to publish
+
+# Bucket layout: 10 XP wide up to 200, then each bucket 10% wider, up to 10M XP
+LINEAR_MAX = 200
+LINEAR_STEP = 10
+BUCKET_GROWTH = 1.1
+MAX_XP = 10_000_000
+
+# leaderboardStats document → userLevels field
+BOARDS = {'weekly': 'weeklyXP', 'allTime': 'totalXP'}
+
+# Copied into the top-N entries (same fields LeaderboardEntry uses)
+DISPLAY_FIELDS = ['username', 'avatar', 'currentLevel', 'streakDays', 'badgesUnlocked']
+
+
+def bucket_edges():
+    """Lower XP bound of every bucket; the last bucket is open-ended"""
+    edges = list(range(0, LINEAR_MAX, LINEAR_STEP))
+    edge = float(LINEAR_MAX)
+    while edge < MAX_XP:
+        edges.append(int(edge))
+        edge = max(edge * BUCKET_GROWTH, edge + 1)
+    return np.array(edges, dtype=np.int64)
+
+
+def build_histogram(xp, edges):
+    """Bucket counts plus the number of users in all higher buckets"""
+    buckets = np.searchsorted(edges, np.maximum(xp, 0), side='right') - 1
+    counts = np.bincount(buckets, minlength=len(edges))
+    above = np.concatenate([np.cumsum(counts[::-1])[::-1][1:], [0]])
+    return counts, above
+
+
+def top_n(ids, xp):
+    """Indices of the TOP_N highest XP values, best first (ties by user ID)"""
+    n = min(TOP_N, len(xp))
+    if n == 0:
+        return np.array([], dtype=np.int64)
+    candidates = np.argpartition(-xp, n - 1)[:n]
+    order = np.lexsort((ids[candidates], -xp[candidates]))
+    return candidates[order]
+
+
+def estimate_rank(stats, xp):
+    """Client-side rank lookup from one leaderboardStats document"""
+    for entry in stats['top']:
+        if xp >= entry['xp']:
+            return entry['rank']
+
+    edges, counts, above = stats['edges'], stats['counts'], stats['above']
+    b = int(np.searchsorted(edges, xp, side='right')) - 1
+    lo = edges[b]
+    hi = edges[b + 1] if b + 1 < len(edges) else max(lo + 1, xp + 1)
+
+    # Assume users are spread evenly across the bucket
+    higher_in_bucket = counts[b] * (hi - 1 - xp) / max(hi - lo, 1)
+    return 1 + above[b] + int(round(higher_in_bucket))
+
+
+def fetch_all(db):
+    """Stream every user's XP (field-masked) into sorted arrays"""
+    ids, weekly, total = [], [], []
+    cursor = None
+    query = db.collection(COLLECTION).order_by(firestore.FieldPath.document_id())
+
+    for page in iter_pages(query, list(BOARDS.values()) + ['lastUpdated'], PAGE_SIZE):
+        for doc in page:
+            data = doc.to_dict()
+            ids.append(doc.id)
+            weekly.append(data.get('weeklyXP') or 0)
+            total.append(data.get('totalXP') or 0)
+            if data.get('lastUpdated') and (cursor is None or data['lastUpdated'] > cursor):
+                cursor = data['lastUpdated']
+        print(f"   Read {len(ids)} users...")
+
+    # Already in document ID order
+    return {
+        'ids': np.array(ids, dtype=np.str_),
+        'weeklyXP': np.array(weekly, dtype=np.int64),
+        'totalXP': np.array(total, dtype=np.int64),
+        'cursor': cursor
+    }
+
+
+def fetch_changes(db, state):
+    """Merge users whose lastUpdated is newer than the saved cursor into the snapshot"""
+    cursor = state['cursor']
+    query = (db.collection(COLLECTION)
+             .where(filter=firestore.FieldFilter('lastUpdated', '>', cursor))
+             .order_by('lastUpdated'))
+
+    changed = {}
+    for page in iter_pages(query, list(BOARDS.values()) + ['lastUpdated'], PAGE_SIZE):
+        for doc in page:
+            data = doc.to_dict()
+            changed[doc.id] = (data.get('weeklyXP') or 0, data.get('totalXP') or 0)
+            cursor = max(cursor, data['lastUpdated'])
+
+    print(f"   Changed since last run: {len(changed)} users")
+    if not changed:
+        return state
+
+    changed_ids = np.array(list(changed), dtype=np.str_)
+    changed_weekly = np.array([xp[0] for xp in changed.values()], dtype=np.int64)
+    changed_total = np.array([xp[1] for xp in changed.values()], dtype=np.int64)
+
+    ids = state['ids']
+    idx = np.searchsorted(ids, changed_ids)
+    found = idx < len(ids)
+    found[found] = ids[idx[found]] == changed_ids[found]
+
+    state['weeklyXP'][idx[found]] = changed_weekly[found]
+    state['totalXP'][idx[found]] = changed_total[found]
+
+    new = ~found
+    if new.any():
+        ids = np.concatenate([ids, changed_ids[new]])
+        order = np.argsort(ids, kind='stable')
+        state['ids'] = ids[order]
+        state['weeklyXP'] = np.concatenate([state['weeklyXP'], changed_weekly[new]])[order]
+        state['totalXP'] = np.concatenate([state['totalXP'], changed_total[new]])[order]
+        print(f"   New users: {int(new.sum())}")
+
+    state['cursor'] = cursor
+    return state
+
+
+def load_state():
+    """Per-user XP snapshot saved by the previous run, or None"""
+    if not os.path.exists(STATE_FILE):
+        return None
+
+    saved = np.load(STATE_FILE, allow_pickle=False)
+    cursor = str(saved['cursor'])
+    return {
+        'ids': saved['ids'],
+        'weeklyXP': saved['weeklyXP'],
+        'totalXP': saved['totalXP'],
+        'cursor': datetime.fromisoformat(cursor) if cursor else None
+    }
+
+
+def save_state(state):
+    """Save the per-user XP snapshot for the next incremental run"""
+    cursor = state['cursor'].isoformat() if state['cursor'] else ''
+    np.savez(STATE_FILE, ids=state['ids'], weeklyXP=state['weeklyXP'],
+             totalXP=state['totalXP'], cursor=np.array(cursor))
+
+
+def build_stats(state, edges):
+    """One leaderboardStats document per board (without display fields)"""
+    stats = {}
+    for board, field in BOARDS.items():
+        xp = state[field]
+        counts, above = build_histogram(xp, edges)
+        top = [
+            {'rank': rank, 'userId': str(state['ids'][i]), 'xp': int(xp[i])}
+            for rank, i in enumerate(top_n(state['ids'], xp), 1)
+            if xp[i] > 0
+        ]
+        stats[board] = {
+            'field': field,
+            'totalUsers': int(len(xp)),
+            'edges': edges.tolist(),
+            'counts': counts.tolist(),
+            'above': above.tolist(),
+            'top': top,
+            'updatedAt': datetime.now().isoformat()
+        }
+    return stats
+
+
+def add_display_fields(db, stats):
+    """Fetch name/avatar/level for the top-N users in one batched read"""
+    user_ids = {entry['userId'] for board in stats.values() for entry in board['top']}
+    refs = [db.collection(COLLECTION).document(user_id) for user_id in user_ids]
+    profiles = {doc.id: doc.to_dict() or {} for doc in db.get_all(refs, field_paths=DISPLAY_FIELDS)}
+
+    for board in stats.values():
+        for entry in board['top']:
+            profile = profiles.get(entry['userId'], {})
+            entry['username'] = profile.get('username', 'User')
+            entry['avatar'] = profile.get('avatar', '👤')
+            entry['level'] = profile.get('currentLevel', 1)
+            entry['streakDays'] = profile.get('streakDays', 0)
+            entry['badgeCount'] = len(profile.get('badgesUnlocked') or [])
+
+
+def publish(db, stats):
+    """Write the leaderboardStats documents"""
+    for board, doc in stats.items():
+        if DRY_RUN:
+            print(f"   [DRY] {STATS_COLLECTION}/{board}: {doc['totalUsers']} users, "
+                  f"{len(doc['edges'])} buckets, top {len(doc['top'])}")
+        else:
+            db.collection(STATS_COLLECTION).document(board).set(doc)
+            print(f"   ✅ {STATS_COLLECTION}/{board}: {doc['totalUsers']} users, "
+                  f"{len(doc['edges'])} buckets, top {len(doc['top'])}")
+
+
+def run_benchmark():
+    """Build buckets for BENCHMARK_USERS synthetic users and measure rank error"""
+    print(f"\n⏱️  Benchmark: {BENCHMARK_USERS:,} synthetic users")
+
+    rng = np.random.default_rng(42)
+    state = {
+        'ids': np.char.add('user', np.arange(BENCHMARK_USERS).astype(np.str_)),
+        'weeklyXP': rng.lognormal(4.5, 1.2, BENCHMARK_USERS).astype(np.int64),
+        'totalXP': rng.lognormal(7.0, 1.5, BENCHMARK_USERS).astype(np.int64),
+        'cursor': None
+    }
+    state['ids'].sort()
+    edges = bucket_edges()
+
+    start = time.time()
+    stats = build_stats(state, edges)
+    elapsed = time.time() - start
+
+    print(f"   Build: {elapsed * 1000:.0f} ms for both boards "
+          f"({2 * BENCHMARK_USERS / elapsed:,.0f} users/sec)")
+
+    for board, field in BOARDS.items():
+        xp = np.sort(state[field])
+        sample = rng.choice(state[field], 1000)
+
+        start = time.time()
+        estimates = np.array([estimate_rank(stats[board], int(x)) for x in sample])
+        lookup = (time.time() - start) / len(sample)
+
+        exact = 1 + len(xp) - np.searchsorted(xp, sample, side='right')
+        error = np.abs(estimates - exact) / len(xp) * 100
+
+        print(f"   {board:8s} lookup {lookup * 1e6:.0f} µs, rank error: "
+              f"median {np.median(error):.3f}%, max {error.max():.3f}% of users")
+
+
+def main():
+    """Main function"""
+    print("="*70)
+    print("🏅 Leaderboard Rank Buckets: userLevels → leaderboardStats")
+    print("="*70)
+
+    if MODE == 'benchmark':
+        run_benchmark()
+        return
+
+    print(f"\n   Mode: {MODE}{' (DRY RUN)' if DRY_RUN else ''}")
+
+    db = initialize_firebase()
+    if not db:
+        return
+
+    start = time.time()
+    state = load_state() if MODE == 'incremental' else None
+
+    if MODE == 'incremental':
+        missing, total = count_missing_field(db.collection(COLLECTION), 'lastUpdated')
+        if missing:
+            print(f"   ⚠️  {missing} of {total} users have no lastUpdated, so their changes can't be "
+                  f"tracked incrementally; doing a full scan")
+            state = None
+        elif state is None or state['cursor'] is None:
+            print("   ⚠️  No usable snapshot from a previous run, doing a full scan")
+            state = None
+
+    if state is None:
+        state = fetch_all(db)
+    else:
+        state = fetch_changes(db, state)
+
+    stats = build_stats(state, bucket_edges())
+    add_display_fields(db, stats)
+
+    print(f"\n📤 Publishing...")
+    publish(db, stats)
+
+    if not DRY_RUN:
+        save_state(state)
+
+    print(f"\n✅ Done in {time.time() - start:.1f}s ({len(state['ids'])} users)\n")
+
+
+if __name__ == '__main__':
+    main()
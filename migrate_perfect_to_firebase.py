@@ -17,14 +17,21 @@ Usage:
 """
 
 import csv
+import os
+import urllib.parse
+import uuid
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, storage
+from google.api_core.exceptions import NotFound
 from datetime import datetime
 
 # Configuration
 CSV_FILE = 'Cam_Voca_2018.csv'  # Updated to use your completed file
 SERVICE_ACCOUNT_KEY = 'serviceAccountKey.json'
 DRY_RUN = True  # Set to False to upload
+EMULATOR_PROJECT_ID = 'yle-x-local'  # Used when FIRESTORE_EMULATOR_HOST is set
+BATCH_LIMIT = 500  # Max writes per Firestore batch
+STORAGE_BUCKET = 'yle-x-65046.firebasestorage.app'  # From GoogleService-Info.plist
 
 # [Same constants as before]
 POS_COLUMNS = [
@@ -67,23 +74,98 @@ CATEGORIES_DATA = {
 
 
 def initialize_firebase():
-    """Initialize Firebase"""
+    """Initialize Firebase (uses the local emulator if FIRESTORE_EMULATOR_HOST is set)"""
     try:
-        cred = credentials.Certificate(SERVICE_ACCOUNT_KEY)
-        firebase_admin.initialize_app(cred)
+        emulator_host = os.environ.get('FIRESTORE_EMULATOR_HOST')
+        if emulator_host:
+            # Emulator accepts any project ID and needs no credentials
+            firebase_admin.initialize_app(options={'projectId': EMULATOR_PROJECT_ID})
+        else:
+            cred = credentials.Certificate(SERVICE_ACCOUNT_KEY)
+            firebase_admin.initialize_app(cred)
         db = firestore.client()
-        print("✅ Firebase initialized")
+        print(f"✅ Firebase initialized{f' (emulator: {emulator_host})' if emulator_host else ''}")
         return db
     except Exception as e:
         print(f"❌ Firebase error: {e}")
         return None
 
 
+def iter_pages(query, fields, page_size, start_after=None):
+    """Yield a query's results as field-masked pages, each resuming after the previous page"""
+    query = query.select(fields)
+    last_doc = start_after
+
+    while True:
+        page_query = query.limit(page_size)
+        if last_doc is not None:
+            page_query = page_query.start_after(last_doc)
+
+        page = list(page_query.stream())
+        if page:
+            yield page
+
+        if len(page) < page_size:
+            return
+        last_doc = page[-1]
+
+
+def commit_batch(db, writes):
+    """Commit up to BATCH_LIMIT (method, ref, data) writes as one batch"""
+    batch = db.batch()
+    for method, ref, data in writes:
+        getattr(batch, method)(ref, data)
+    batch.commit()
+    return len(writes)
+
+
+def commit_updates(db, writes):
+    """Commit 'update' writes in batches, skipping documents that don't exist: (written, missing paths)"""
+    written, missing = 0, []
+    for i in range(0, len(writes), BATCH_LIMIT):
+        chunk = writes[i:i + BATCH_LIMIT]
+        try:
+            written += commit_batch(db, chunk)
+        except NotFound:
+            # One missing document fails the whole batch; retry with the ones that exist
+            existing = {doc.reference.path for doc in db.get_all([ref for _, ref, _ in chunk], field_paths=[])
+                        if doc.exists}
+            missing += [ref.path for _, ref, _ in chunk if ref.path not in existing]
+            chunk = [write for write in chunk if write[1].path in existing]
+            if chunk:
+                written += commit_batch(db, chunk)
+    return written, missing
+
+
+def upload_to_storage(local_path, remote_path, content_type):
+    """Upload a file to the app's Storage bucket and return a download URL for it"""
+    token = str(uuid.uuid4())
+    blob = storage.bucket(STORAGE_BUCKET).blob(remote_path)
+    blob.metadata = {'firebaseStorageDownloadTokens': token}
+    blob.cache_control = 'public, max-age=31536000'
+    blob.upload_from_filename(local_path, content_type=content_type)
+    return (f"https://firebasestorage.googleapis.com/v0/b/{STORAGE_BUCKET}/o/"
+            f"{urllib.parse.quote(remote_path, safe='')}?alt=media&token={token}")
+
+
+def count_missing_field(collection, field):
+    """Documents in a collection without a field (two count aggregations, no document reads)"""
+    total = collection.count().get()[0][0].value
+    # Ordering by a field leaves out documents that don't have it
+    stamped = collection.order_by(field).count().get()[0][0].value
+    return total - stamped, total
+
+
+def make_word_id(word):
+    """Firestore document ID for a word (shared by every script that touches dictionaries)"""
+    return word.strip().lower().replace(' ', '_').replace("'", '').replace('-', '_')
+
+
 def parse_csv_row(row):
     """Parse PERFECT CSV row to Firestore format"""
     word_british = row['british'].strip()
     word_american = row['american'].strip()
-    word_id = word_british.lower().replace(' ', '_').replace("'", '').replace('-', '_')
+    word_id = make_word_id(word_british)
 
     # Grammar
     pos_list = [pos for pos in POS_COLUMNS if row[pos] == 'True']
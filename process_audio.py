@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Audio Post-Processing: silence trimming, loudness normalization, duration metadata
+
+Pronunciation clips (cambridgeAudioGB / cambridgeAudioUS / audioValue) come
+from several dictionaries with different leading silence and loudness,
+which adds latency to every tap-to-play in the app.
+
+For every clip the CSV references (same accent priority as parse_csv_row):
+1. Download once into SOURCE_DIR (kept as a local cache)
+2. Decode to mono PCM with ffmpeg
+3. Trim leading/trailing silence and normalize loudness with NumPy
+   (frame RMS, target RMS level, peak ceiling)
+4. Encode into OUTPUT_DIR and record durationMs / peakDb of both the
+   original and the processed clip
+
+Clips run in parallel across a process pool. A clip is skipped when its
+source hash and the processing settings match OUTPUT_DIR/manifest.json.
+
+With DRY_RUN = False the metadata is written to Firestore as
+pronunciation.british.durationMs / .peakDb (and .american.*), so the app
+can decide what to preload. It always describes the clip audioUrl points at:
+- UPLOAD_PROCESSED = False: audioUrl stays the original clip, so the
+  original's duration and peak are written
+- UPLOAD_PROCESSED = True: processed clips are uploaded to Firebase Storage,
+  audioUrl is pointed at them (the original is kept in sourceAudioUrl) and
+  the processed clip's duration and peak are written
+
+Run it again after migrate_perfect_to_firebase.py, which rewrites whole
+documents.
+
+Requires ffmpeg on PATH. Set MODE = 'benchmark' to measure the NumPy stage
+on synthetic clips without ffmpeg or network access.
+
+Usage:
+    python3 process_audio.py
+"""
+
+import csv
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from firebase_admin import firestore
+from migrate_perfect_to_firebase import (CSV_FILE, commit_updates, initialize_firebase, parse_csv_row,
+                                         upload_to_storage)
+
+# Configuration
+MODE = 'process'  # 'process' or 'benchmark'
+SOURCE_DIR = 'audio_cache/source'  # Downloaded originals
+OUTPUT_DIR = 'audio_processed'
+MANIFEST_FILE = os.path.join(OUTPUT_DIR, 'manifest.json')
+WORKERS = os.cpu_count() or 4
+UPLOAD_PROCESSED = False  # Set to True to upload processed clips and point audioUrl at them
+STORAGE_PREFIX = 'audio/processed'  # Storage folder for uploaded clips
+UPLOAD_WORKERS = 8
+DRY_RUN = True  # Set to False to write durationMs / peakDb to Firestore
+BENCHMARK_CLIPS = 2000
+
+# Processing settings (changing any of them invalidates the cache)
+SETTINGS = {
+    'sampleRate': 22050,
+    'bitrate': '48k',
+    'frameMs': 10,
+    'silenceDb': -45.0,  # Frames quieter than this are silence
+    'padMs': 30,  # Kept around the voiced part
+    'targetRmsDb': -20.0,
+    'peakCeilingDb': -1.0
+}
+SETTINGS_HASH = hashlib.sha1(json.dumps(SETTINGS, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+ACCENTS = ['british', 'american']
+
+
+def to_db(value):
+    return float(20 * np.log10(max(float(value), 1e-10)))
+
+
+def trim_silence(samples, sample_rate):
+    """Cut leading/trailing frames below silenceDb, keeping padMs around speech"""
+    frame = max(1, sample_rate * SETTINGS['frameMs'] // 1000)
+    frames = len(samples) // frame
+    if frames == 0:
+        return samples
+
+    rms = np.sqrt(np.mean(np.square(samples[:frames * frame].reshape(frames, frame)), axis=1))
+    voiced = np.flatnonzero(rms > 10 ** (SETTINGS['silenceDb'] / 20))
+    if len(voiced) == 0:
+        return samples[:0]
+
+    pad = sample_rate * SETTINGS['padMs'] // 1000
+    start = max(0, voiced[0] * frame - pad)
+    end = min(len(samples), (voiced[-1] + 1) * frame + pad)
+    return samples[start:end]
+
+
+def normalize_loudness(samples):
+    """Scale to targetRmsDb without letting the peak exceed peakCeilingDb"""
+    if len(samples) == 0:
+        return samples, 0.0
+
+    rms = np.sqrt(np.mean(np.square(samples)))
+    peak = np.max(np.abs(samples))
+    gain_db = SETTINGS['targetRmsDb'] - to_db(rms)
+    gain_db = min(gain_db, SETTINGS['peakCeilingDb'] - to_db(peak))
+
+    return (samples * np.float32(10 ** (gain_db / 20))).astype(np.float32), gain_db
+
+
+def process_samples(samples, sample_rate):
+    """Trim + normalize one clip: (processed samples, metadata)"""
+    trimmed = trim_silence(samples, sample_rate)
+    processed, gain_db = normalize_loudness(trimmed)
+    peak = np.max(np.abs(processed)) if len(processed) else 0.0
+
+    return processed, {
+        'durationMs': int(round(len(processed) * 1000 / sample_rate)),
+        'peakDb': round(to_db(peak), 2),
+        'sourceDurationMs': int(round(len(samples) * 1000 / sample_rate)),
+        'sourcePeakDb': round(to_db(np.max(np.abs(samples)) if len(samples) else 0.0), 2),
+        'gainDb': round(gain_db, 2),
+        'trimmedMs': int(round((len(samples) - len(trimmed)) * 1000 / sample_rate))
+    }
+
+
+def decode(path, sample_rate):
+    """Any audio file → mono float32 PCM via ffmpeg"""
+    result = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-i', path, '-f', 'f32le', '-ac', '1', '-ar', str(sample_rate), '-'],
+        capture_output=True, check=True
+    )
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def encode(samples, sample_rate, path):
+    """Mono float32 PCM → mp3 via ffmpeg"""
+    subprocess.run(
+        ['ffmpeg', '-v', 'error', '-y', '-f', 'f32le', '-ac', '1', '-ar', str(sample_rate), '-i', '-',
+         '-b:a', SETTINGS['bitrate'], path],
+        input=samples.tobytes(), capture_output=True, check=True
+    )
+
+
+def process_clip(job):
+    """Worker: download (if needed), hash, and process one clip unless it's cached"""
+    url, source_path, output_path, cached = job
+
+    if not os.path.exists(source_path):
+        with urllib.request.urlopen(url, timeout=30) as response, open(source_path + '.part', 'wb') as f:
+            shutil.copyfileobj(response, f)
+        os.replace(source_path + '.part', source_path)
+
+    with open(source_path, 'rb') as f:
+        source_hash = hashlib.sha256(f.read()).hexdigest()
+
+    if (cached and cached['sourceHash'] == source_hash and cached['settings'] == SETTINGS_HASH
+            and 'sourceDurationMs' in cached and os.path.exists(output_path)):
+        return url, cached, True
+
+    sample_rate = SETTINGS['sampleRate']
+    processed, metadata = process_samples(decode(source_path, sample_rate), sample_rate)
+    if len(processed) == 0:
+        raise ValueError('clip is silent')
+    encode(processed, sample_rate, output_path)
+
+    metadata.update({
+        'sourceHash': source_hash,
+        'settings': SETTINGS_HASH,
+        'output': os.path.basename(output_path),
+        'bytesIn': os.path.getsize(source_path),
+        'bytesOut': os.path.getsize(output_path)
+    })
+    return url, metadata, False
+
+
+def collect_clips():
+    """{url: [(word_id, accent), ...]} for every clip the migration would upload"""
+    clips = {}
+    with open(CSV_FILE, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            word_id, doc = parse_csv_row(row)
+            for accent in ACCENTS:
+                url = doc['pronunciation'][accent]['audioUrl']
+                if url:
+                    clips.setdefault(url, []).append((word_id, accent))
+    return clips
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_FILE):
+        return {}
+    with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    with open(MANIFEST_FILE + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(MANIFEST_FILE + '.tmp', MANIFEST_FILE)
+
+
+def upload_processed(manifest, urls):
+    """Upload processed clips that aren't in Storage yet (content-addressed, so never overwritten)"""
+    pending = [url for url in urls if not manifest[url].get('uploadedUrl')]
+
+    def upload(url):
+        metadata = manifest[url]
+        remote_path = f"{STORAGE_PREFIX}/{metadata['sourceHash'][:16]}_{metadata['settings']}.mp3"
+        return url, upload_to_storage(os.path.join(OUTPUT_DIR, metadata['output']), remote_path, 'audio/mpeg')
+
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        for url, download_url in executor.map(upload, pending):
+            manifest[url]['uploadedUrl'] = download_url
+
+    save_manifest(manifest)
+    print(f"   ☁️  Uploaded {len(pending)} clips to {STORAGE_PREFIX}/")
+
+
+def update_firestore(db, clips, manifest):
+    """Write durationMs / peakDb (and audioUrl) under pronunciation.<accent> for every processed clip"""
+    urls = [url for url in clips if url in manifest]
+    if UPLOAD_PROCESSED:
+        upload_processed(manifest, urls)
+
+    writes = []
+    for url in urls:
+        metadata = manifest[url]
+        for word_id, accent in clips[url]:
+            prefix = f'pronunciation.{accent}'
+            if UPLOAD_PROCESSED:
+                data = {
+                    f'{prefix}.audioUrl': metadata['uploadedUrl'],
+                    f'{prefix}.sourceAudioUrl': url,
+                    f'{prefix}.durationMs': metadata['durationMs'],
+                    f'{prefix}.peakDb': metadata['peakDb']
+                }
+            else:
+                data = {
+                    f'{prefix}.audioUrl': url,
+                    f'{prefix}.sourceAudioUrl': firestore.DELETE_FIELD,
+                    f'{prefix}.durationMs': metadata['sourceDurationMs'],
+                    f'{prefix}.peakDb': metadata['sourcePeakDb']
+                }
+            writes.append(('update', db.collection('dictionaries').document(word_id), data))
+
+    written, missing = commit_updates(db, writes)
+    print(f"   ✅ Updated metadata on {written} pronunciations")
+    if missing:
+        word_ids = sorted({path.split('/')[-1] for path in missing})
+        print(f"   ⚠️  Skipped {len(word_ids)} words with no document (run migrate_perfect_to_firebase.py "
+              f"first): {', '.join(word_ids[:5])}")
+
+
+def process_all():
+    """Process every referenced clip across a process pool"""
+    if not shutil.which('ffmpeg'):
+        print("❌ ffmpeg not found on PATH")
+        return
+
+    os.makedirs(SOURCE_DIR, exist_ok=True)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    clips = collect_clips()
+    manifest = load_manifest()
+    print(f"\n🎧 Processing {len(clips)} clips with {WORKERS} workers...")
+
+    jobs = []
+    for url in clips:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        extension = os.path.splitext(url.split('?')[0])[1] or '.mp3'
+        jobs.append((url, os.path.join(SOURCE_DIR, key + extension),
+                     os.path.join(OUTPUT_DIR, key + '.mp3'), manifest.get(url)))
+
+    processed = skipped = failed = 0
+    start = time.time()
+
+    with ProcessPoolExecutor(max_workers=WORKERS) as executor:
+        futures = {executor.submit(process_clip, job): job[0] for job in jobs}
+        for idx, future in enumerate(futures, 1):
+            try:
+                url, metadata, was_cached = future.result()
+                manifest[url] = metadata
+                if was_cached:
+                    skipped += 1
+                else:
+                    processed += 1
+            except Exception as e:
+                failed += 1
+                if failed <= 5:
+                    print(f"   ❌ {futures[future][:70]}: {e}")
+
+            if idx % 100 == 0:
+                print(f"   {idx}/{len(jobs)} clips...")
+
+    elapsed = time.time() - start
+    save_manifest(manifest)
+
+    done = [manifest[url] for url in clips if url in manifest]
+    print(f"\n{'='*70}")
+    print(f"📊 Audio Processing Summary:")
+    print(f"   ✅ Processed:          {processed}")
+    print(f"   ⏭️  Unchanged (cached): {skipped}")
+    print(f"   ❌ Failed:             {failed}")
+    if done:
+        print(f"   ✂️  Avg silence trimmed: {np.mean([m['trimmedMs'] for m in done]):.0f} ms")
+        print(f"   ⏱️  Avg duration:        {np.mean([m['durationMs'] for m in done]):.0f} ms")
+    print(f"   🚀 {elapsed:.1f}s ({processed / elapsed if elapsed else 0:.1f} clips/sec processed)")
+    print(f"{'='*70}\n")
+
+    if DRY_RUN:
+        print(f"   [DRY] Metadata kept in {MANIFEST_FILE}; set DRY_RUN = False to write it to Firestore\n")
+    else:
+        db = initialize_firebase()
+        if db:
+            update_firestore(db, clips, manifest)
+
+
+def synthetic_clip(seed):
+    """~1.5 s clip: random leading/trailing silence around a noisy tone burst"""
+    rng = np.random.default_rng(seed)
+    sample_rate = SETTINGS['sampleRate']
+    lead, voiced, tail = (int(sample_rate * s) for s in rng.uniform([0.05, 0.4, 0.05], [0.5, 1.0, 0.5]))
+    t = np.arange(voiced) / sample_rate
+    speech = rng.uniform(0.05, 0.9) * np.sin(2 * np.pi * rng.uniform(120, 300) * t) * np.hanning(voiced)
+    clip = np.concatenate([np.zeros(lead), speech, np.zeros(tail)]).astype(np.float32)
+    return clip + rng.normal(0, 1e-4, len(clip)).astype(np.float32)
+
+
+def benchmark_worker(seed):
+    _, metadata = process_samples(synthetic_clip(seed), SETTINGS['sampleRate'])
+    return metadata['trimmedMs']
+
+
+def run_benchmark():
+    """Clips/sec of the NumPy trim + normalize stage, single process and pooled"""
+    print(f"\n⏱️  Benchmark: {BENCHMARK_CLIPS} synthetic clips")
+
+    start = time.time()
+    trimmed = [benchmark_worker(seed) for seed in range(BENCHMARK_CLIPS)]
+    single = time.time() - start
+    print(f"   1 process:   {BENCHMARK_CLIPS / single:,.0f} clips/sec "
+          f"(avg {np.mean(trimmed):.0f} ms silence trimmed)")
+
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=WORKERS) as executor:
+        list(executor.map(benchmark_worker, range(BENCHMARK_CLIPS), chunksize=64))
+    pooled = time.time() - start
+    print(f"   {WORKERS} workers:   {BENCHMARK_CLIPS / pooled:,.0f} clips/sec")
+    print("   (decode/encode via ffmpeg and downloads not included)\n")
+
+
+def main():
+    """Main function"""
+    print("="*70)
+    print("🎧 Audio Post-Processing: trim, normalize, duration metadata")
+    print("="*70)
+
+    if MODE == 'benchmark':
+        run_benchmark()
+    else:
+        process_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Word Image Pipeline: multi-resolution thumbnails with content-hash caching
+
+parse_csv_row() always uploads imageUrl: '', so the dictionary and flashcard
+screens have no pictures. This stage turns a folder of source images named
+by word ID (e.g. images/source/ice_cream.png) into small fixed-size
+variants the app can download cheaply.
+
+For each source image:
+1. Hash its content; identical images (shared by several words) are
+   processed once, and unchanged sources are skipped on the next run
+2. Generate square VARIANTS (WebP or JPEG) in parallel worker processes,
+   named by content hash and settings so they can be cached forever by a CDN
+3. Optionally pack the 'thumb' variants into one sprite atlas per category
+
+With DRY_RUN = False the variants are uploaded to the app's Firebase
+Storage bucket (STORAGE_PREFIX) and the dictionaries documents are filled:
+    imageUrl:       DEFAULT_VARIANT URL (still a string, as the app expects)
+    imageVariants:  {thumb, small, medium} URLs
+Words whose source image was removed get imageUrl cleared again.
+
+migrate_perfect_to_firebase.py rewrites whole documents; after re-running
+it, run this with REPUBLISH = True.
+
+Requires Pillow (pip install pillow).
+
+Usage:
+    python3 process_images.py
+"""
+
+import csv
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from firebase_admin import firestore
+from migrate_perfect_to_firebase import (CATEGORY_COLUMNS, CSV_FILE, commit_updates, initialize_firebase,
+                                         make_word_id, upload_to_storage)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Configuration
+SOURCE_DIR = 'images/source'  # {wordId}.png / .jpg / .jpeg / .webp
+OUTPUT_DIR = 'images/processed'
+MANIFEST_FILE = os.path.join(OUTPUT_DIR, 'manifest.json')
+STORAGE_PREFIX = 'images/words'  # Storage folder for uploaded variants
+WORKERS = os.cpu_count() or 4
+UPLOAD_WORKERS = 8
+BUILD_ATLASES = False  # Set to True to build per-category sprite atlases of the thumbnails
+REPUBLISH = False  # Set to True to rewrite every word (e.g. after re-running the migration)
+DRY_RUN = True  # Set to False to upload variants and write imageUrl / imageVariants to Firestore
+
+# Variant name → square size in pixels
+VARIANTS = {'thumb': 96, 'small': 256, 'medium': 512}
+DEFAULT_VARIANT = 'small'
+OUTPUT_FORMAT = 'webp'  # 'webp' or 'jpeg'
+QUALITY = 80
+
+SOURCE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp'}
+SETTINGS_HASH = hashlib.sha1(
+    json.dumps([VARIANTS, OUTPUT_FORMAT, QUALITY], sort_keys=True).encode('utf-8')
+).hexdigest()[:12]
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def variant_filename(source_hash, variant):
+    """Content hash + size/quality/format, so changed settings never reuse an old file or Storage URL"""
+    extension = 'jpg' if OUTPUT_FORMAT == 'jpeg' else OUTPUT_FORMAT
+    return f"{source_hash[:16]}_{variant}_{VARIANTS[variant]}q{QUALITY}.{extension}"
+
+
+def save_image(image, path):
+    """Write atomically so an interrupted run never leaves a truncated file behind"""
+    if OUTPUT_FORMAT == 'webp':
+        image.save(path + '.tmp', format='WEBP', quality=QUALITY, method=4)
+    else:
+        image.convert('RGB').save(path + '.tmp', format='JPEG', quality=QUALITY, optimize=True, progressive=True)
+    os.replace(path + '.tmp', path)
+
+
+def make_variants(job):
+    """Worker: every size variant of one source image: {variant: (filename, bytes)}"""
+    source_path, source_hash = job
+    results = {}
+
+    with Image.open(source_path) as source:
+        source = ImageOps.exif_transpose(source)
+        source = source.convert('RGBA' if OUTPUT_FORMAT == 'webp' else 'RGB')
+
+        for variant, size in VARIANTS.items():
+            filename = variant_filename(source_hash, variant)
+            path = os.path.join(OUTPUT_DIR, filename)
+            if not os.path.exists(path):
+                save_image(ImageOps.fit(source, (size, size), Image.LANCZOS), path)
+            results[variant] = (filename, os.path.getsize(path))
+
+    return source_hash, results
+
+
+def scan_sources():
+    """{word_id: path} for every source image"""
+    sources = {}
+    for name in sorted(os.listdir(SOURCE_DIR)):
+        word_id, extension = os.path.splitext(name)
+        if extension.lower() in SOURCE_EXTENSIONS:
+            sources[word_id] = os.path.join(SOURCE_DIR, name)
+    return sources
+
+
+def load_manifest():
+    manifest = {'words': {}, 'atlases': {}, 'uploads': {}, 'unpublish': []}
+    if os.path.exists(MANIFEST_FILE):
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest.update(json.load(f))
+    return manifest
+
+
+def save_manifest(manifest):
+    with open(MANIFEST_FILE + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(MANIFEST_FILE + '.tmp', MANIFEST_FILE)
+
+
+def is_unchanged(entry, stat):
+    """Same file (mtime/size), same settings, outputs still on disk → skip without re-hashing"""
+    return (entry and entry['settings'] == SETTINGS_HASH
+            and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size
+            and all(os.path.exists(os.path.join(OUTPUT_DIR, filename))
+                    for filename in entry['variants'].values()))
+
+
+def build_atlases(manifest, categories):
+    """Pack each category's thumbnails into one grid image; rebuilt only when its members change"""
+    size = VARIANTS['thumb']
+    atlases = {}
+
+    for category, word_ids in categories.items():
+        members = sorted(word_id for word_id in word_ids if word_id in manifest['words'])
+        if not members:
+            continue
+
+        thumbs = [manifest['words'][word_id]['variants']['thumb'] for word_id in members]
+        atlas_hash = hashlib.sha1(json.dumps([members, thumbs]).encode('utf-8')).hexdigest()
+        filename = f"atlas_{category}_{atlas_hash[:12]}.{'jpg' if OUTPUT_FORMAT == 'jpeg' else OUTPUT_FORMAT}"
+        columns = math.ceil(math.sqrt(len(members)))
+
+        if not os.path.exists(os.path.join(OUTPUT_DIR, filename)):
+            rows = math.ceil(len(members) / columns)
+            atlas = Image.new('RGBA', (columns * size, rows * size), (0, 0, 0, 0))
+            for position, thumb in enumerate(thumbs):
+                with Image.open(os.path.join(OUTPUT_DIR, thumb)) as image:
+                    atlas.paste(image, ((position % columns) * size, (position // columns) * size))
+            save_image(atlas, os.path.join(OUTPUT_DIR, filename))
+
+        atlases[category] = {
+            'file': filename,
+            'cellSize': size,
+            'frames': {word_id: [(i % columns) * size, (i // columns) * size] for i, word_id in enumerate(members)}
+        }
+
+    return atlases
+
+
+def load_categories():
+    """{category: [word_id, ...]} from the CSV (flags are 'TRUE'/'True' depending on the export)"""
+    categories = {}
+    with open(CSV_FILE, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            for category in CATEGORY_COLUMNS:
+                if row.get(category, '').strip().lower() == 'true':
+                    categories.setdefault(category, []).append(make_word_id(row['british']))
+    return categories
+
+
+def upload_variants(manifest, word_ids):
+    """Upload variant files not in Storage yet; shared images are uploaded once"""
+    filenames = {filename for word_id in word_ids for filename in manifest['words'][word_id]['variants'].values()}
+    pending = sorted(filename for filename in filenames if filename not in manifest['uploads'])
+    content_type = 'image/jpeg' if OUTPUT_FORMAT == 'jpeg' else f'image/{OUTPUT_FORMAT}'
+
+    def upload(filename):
+        return filename, upload_to_storage(os.path.join(OUTPUT_DIR, filename),
+                                           f"{STORAGE_PREFIX}/{filename}", content_type)
+
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        for filename, url in executor.map(upload, pending):
+            manifest['uploads'][filename] = url
+
+    save_manifest(manifest)
+    print(f"   ☁️  Uploaded {len(pending)} files to {STORAGE_PREFIX}/")
+
+
+def update_firestore(db, manifest):
+    """Fill imageUrl (default size) and imageVariants for words not yet published; clear removed ones"""
+    word_ids = [word_id for word_id, entry in manifest['words'].items() if REPUBLISH or not entry.get('published')]
+    upload_variants(manifest, word_ids)
+
+    collection = db.collection('dictionaries')
+    writes = []
+    for word_id in word_ids:
+        variants = {variant: manifest['uploads'][filename]
+                    for variant, filename in manifest['words'][word_id]['variants'].items()}
+        writes.append(('update', collection.document(word_id), {
+            'imageUrl': variants[DEFAULT_VARIANT],
+            'imageVariants': variants
+        }))
+    cleared = [word_id for word_id in set(manifest['unpublish']) if word_id not in manifest['words']]
+    for word_id in cleared:
+        writes.append(('update', collection.document(word_id), {
+            'imageUrl': '',
+            'imageVariants': firestore.DELETE_FIELD
+        }))
+
+    _, missing = commit_updates(db, writes)
+    missing_ids = {path.split('/')[-1] for path in missing}
+    for word_id in word_ids:
+        manifest['words'][word_id]['published'] = word_id not in missing_ids
+    manifest['unpublish'] = []
+    save_manifest(manifest)
+
+    print(f"   ✅ Updated images on {len(set(word_ids) - missing_ids)} words, "
+          f"cleared {len(set(cleared) - missing_ids)}")
+    if missing_ids:
+        print(f"   ⚠️  Skipped {len(missing_ids)} words with no document: {', '.join(sorted(missing_ids)[:5])}")
+
+
+def process_images():
+    """Incrementally build variants for every source image"""
+    if Image is None:
+        print("❌ Pillow is not installed (pip install pillow)")
+        return
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    manifest = load_manifest()
+    sources = scan_sources()
+    print(f"\n🖼️  {len(sources)} source images in {SOURCE_DIR}")
+
+    start = time.time()
+    unchanged = 0
+    pending = {}  # word_id → (path, hash, stat)
+
+    for word_id, path in sources.items():
+        stat = os.stat(path)
+        entry = manifest['words'].get(word_id)
+        if is_unchanged(entry, stat):
+            unchanged += 1
+            continue
+        pending[word_id] = (path, file_hash(path), stat)
+
+    # Identical images are processed once, whichever word they belong to
+    jobs = {source_hash: path for path, source_hash, _ in pending.values()}
+    print(f"   Changed: {len(pending)} words, {len(jobs)} unique images, {WORKERS} workers")
+
+    results = {}
+    failed = 0
+    with ProcessPoolExecutor(max_workers=WORKERS) as executor:
+        futures = {executor.submit(make_variants, (path, source_hash)): path for source_hash, path in jobs.items()}
+        for future in futures:
+            try:
+                source_hash, variants = future.result()
+                results[source_hash] = variants
+            except Exception as e:
+                failed += 1
+                if failed <= 5:
+                    print(f"   ❌ {futures[future]}: {e}")
+
+    for word_id, (path, source_hash, stat) in pending.items():
+        if source_hash not in results:
+            continue  # Failed; retried on the next run
+        manifest['words'][word_id] = {
+            'sourceHash': source_hash,
+            'settings': SETTINGS_HASH,
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'variants': {variant: filename for variant, (filename, _) in results[source_hash].items()},
+            'bytes': {variant: size for variant, (_, size) in results[source_hash].items()}
+        }
+
+    # Published words whose image is gone get imageUrl cleared on the next live run
+    removed = [word_id for word_id in manifest['words'] if word_id not in sources]
+    for word_id in removed:
+        if manifest['words'].pop(word_id).get('published'):
+            manifest['unpublish'].append(word_id)
+
+    if BUILD_ATLASES:
+        manifest['atlases'] = build_atlases(manifest, load_categories())
+        print(f"   🧩 Atlases: {len(manifest['atlases'])} categories")
+
+    save_manifest(manifest)
+    elapsed = time.time() - start
+
+    # Originals vs what the app downloads, counting each unique image once
+    unique = {entry['sourceHash']: entry for entry in manifest['words'].values()}
+    original_bytes = sum(os.path.getsize(sources[word_id]) for word_id, entry in manifest['words'].items()
+                         if unique[entry['sourceHash']] is entry)
+    variant_bytes = {variant: sum(entry['bytes'][variant] for entry in unique.values()) for variant in VARIANTS}
+
+    print(f"\n{'='*70}")
+    print(f"📊 Image Pipeline Summary:")
+    print(f"   ✅ Processed:        {len(results)} images ({len(pending) - len(jobs)} duplicates reused)")
+    print(f"   ⏭️  Unchanged:        {unchanged}")
+    print(f"   ❌ Failed:           {failed}")
+    print(f"   🗑️  Removed sources:  {len(removed)} ({len(manifest['unpublish'])} to clear in Firestore)")
+    print(f"   📦 Originals:        {original_bytes / 1024:,.0f} KB")
+    for variant, size in variant_bytes.items():
+        saved = (1 - size / original_bytes) * 100 if original_bytes else 0
+        print(f"   📐 {variant:8s} {VARIANTS[variant]:4d}px  {size / 1024:,.0f} KB ({saved:.0f}% saved)")
+    print(f"   ⏱️  {elapsed:.1f}s")
+    print(f"{'='*70}\n")
+
+    if DRY_RUN:
+        print("   [DRY] Set DRY_RUN = False to upload the variants and fill imageUrl\n")
+    else:
+        db = initialize_firebase()
+        if db:
+            update_firestore(db, manifest)
+
+
+def main():
+    """Main function"""
+    print("="*70)
+    print("🖼️  Word Images: source images → thumbnails → Firebase")
+    print("="*70)
+
+    process_images()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Gamification Config Publisher: gamification_config.json → versioned Firestore bundle
+
+GamificationService reads the whole badges and missions collections on
+every load (one document read per badge and per mission). This publishes
+them the way upload_categories() publishes CATEGORIES_DATA, but as one
+versioned bundle:
+
+    gamificationConfigVersions/v{n}   badges + missions in a single document
+    gamificationConfig/current        {version, contentHash, ...} pointer
+
+Clients read the small pointer and only fetch the bundle when its version
+differs from the one they have cached. While the app still reads the
+collections, SYNC_COLLECTIONS keeps badges/ and missions/ in step, writing
+only the definitions that changed since the previous version.
+
+Definitions dropped from SOURCE_FILE are deleted only if an earlier version
+published them. Documents of unknown origin (everything already in the
+collections on the first publish) are kept and listed; set
+PRUNE_COLLECTIONS to delete them too, once SOURCE_FILE has every badge and
+mission you want to keep.
+
+Modes:
+- 'publish':  validate the source file and publish it as a new version
+              (skipped if its content hash matches the current version)
+- 'rollback': point clients back at ROLLBACK_VERSION (default: the
+              newest version older than the current one)
+- 'list':     show published versions
+
+DRY_RUN prints what would be written and a read/write cost report.
+
+Usage:
+    python3 publish_gamification_config.py
+
+    # Against the local emulator
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python3 publish_gamification_config.py
+"""
+
+import hashlib
+import json
+import re
+from datetime import datetime, timezone
+from migrate_perfect_to_firebase import BATCH_LIMIT, commit_batch, initialize_firebase
+
+# Configuration
+SOURCE_FILE = 'gamification_config.json'
+MODE = 'publish'  # 'publish', 'rollback' or 'list'
+ROLLBACK_VERSION = None  # Version to roll back to (None = the one before the current)
+POINTER_COLLECTION = 'gamificationConfig'
+POINTER_DOC = 'current'
+VERSION_COLLECTION = 'gamificationConfigVersions'
+SYNC_COLLECTIONS = True  # Also keep badges/ and missions/ in sync for current app builds
+PRUNE_COLLECTIONS = False  # Set to True to delete badges/missions docs that no version published
+CLIENT_LOADS_PER_DAY = 10_000  # Used for the cost report only
+DRY_RUN = True  # Set to False to publish
+
+# Firestore pricing (USD per 100K operations) for the cost report
+READ_PRICE = 0.06
+WRITE_PRICE = 0.18
+DELETE_PRICE = 0.02
+
+MAX_DOCUMENT_BYTES = 1_000_000  # Firestore limit is 1 MiB, keep some headroom
+
+ID_PATTERN = re.compile(r'^[a-z0-9_]+$')
+COLOR_PATTERN = re.compile(r'^#[0-9A-Fa-f]{6}$')
+
+# Field → expected type(s), matching the Badge and Mission models in the app
+BADGE_FIELDS = {
+    'id': str, 'name': str, 'description': str, 'icon': str, 'emoji': str,
+    'rarity': str, 'color': str, 'requirement': dict, 'xpReward': int
+}
+MISSION_FIELDS = {
+    'id': str, 'title': str, 'description': str, 'icon': str, 'emoji': str,
+    'difficulty': str, 'category': str, 'resetDaily': bool, 'requirement': dict,
+    'reward': dict, 'active': bool, 'createdAt': str
+}
+BADGE_RARITIES = {'common', 'rare', 'epic', 'legendary'}
+MISSION_DIFFICULTIES = {'easy', 'medium', 'hard'}
+MISSION_CATEGORIES = {'daily', 'weekly', 'special', 'skill'}  # As filtered by fetchMissions()
+
+# Bundle key → legacy collection
+KINDS = {'badges': 'badges', 'missions': 'missions'}
+
+
+def digest(value):
+    """Short content hash of a JSON-compatible value"""
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def check_fields(label, item, fields, errors):
+    """Required fields present with the right type (bool is not accepted as int)"""
+    for field, expected in fields.items():
+        value = item.get(field)
+        if value is None or value == '':
+            errors.append(f"{label}: Missing {field}")
+        elif not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            errors.append(f"{label}: {field} should be {expected.__name__}, got {type(value).__name__}")
+
+
+def check_requirement(label, requirement, errors):
+    if not isinstance(requirement, dict):
+        return
+    if not isinstance(requirement.get('type'), str) or not requirement['type']:
+        errors.append(f"{label}: requirement.type is required")
+    value = requirement.get('value')
+    if value is not None and not isinstance(value, (int, float, str, bool)):
+        errors.append(f"{label}: requirement.value must be a number, string or bool")
+
+
+def validate_config(config):
+    """List of problems with the source definitions (empty if publishable)"""
+    errors = []
+
+    for kind in KINDS:
+        if not isinstance(config.get(kind), list):
+            errors.append(f"'{kind}' must be a list")
+            continue
+
+        seen = set()
+        for idx, item in enumerate(config[kind], 1):
+            item_id = item.get('id') if isinstance(item, dict) else None
+            label = f"{kind}[{idx}] ({item_id or '?'})"
+            if not isinstance(item, dict):
+                errors.append(f"{label}: must be an object")
+                continue
+
+            if isinstance(item_id, str):
+                if not ID_PATTERN.match(item_id):
+                    errors.append(f"{label}: id must be lowercase letters, digits and '_'")
+                if item_id in seen:
+                    errors.append(f"{label}: Duplicate id")
+                seen.add(item_id)
+
+            if kind == 'badges':
+                check_fields(label, item, BADGE_FIELDS, errors)
+                if item.get('rarity') not in BADGE_RARITIES:
+                    errors.append(f"{label}: rarity must be one of {sorted(BADGE_RARITIES)}")
+                if isinstance(item.get('color'), str) and not COLOR_PATTERN.match(item['color']):
+                    errors.append(f"{label}: color must be #RRGGBB, got {item['color']}")
+                if isinstance(item.get('xpReward'), int) and item['xpReward'] < 0:
+                    errors.append(f"{label}: xpReward must not be negative")
+            else:
+                check_fields(label, item, MISSION_FIELDS, errors)
+                if item.get('difficulty') not in MISSION_DIFFICULTIES:
+                    errors.append(f"{label}: difficulty must be one of {sorted(MISSION_DIFFICULTIES)}")
+                if item.get('category') not in MISSION_CATEGORIES:
+                    errors.append(f"{label}: category must be one of {sorted(MISSION_CATEGORIES)}")
+                reward = item.get('reward')
+                if isinstance(reward, dict):
+                    for field in ('xp', 'coins'):
+                        if not isinstance(reward.get(field), int) or isinstance(reward.get(field), bool) \
+                                or reward[field] < 0:
+                            errors.append(f"{label}: reward.{field} must be a non-negative int")
+                if isinstance(item.get('createdAt'), str):
+                    try:
+                        datetime.fromisoformat(item['createdAt'])
+                    except ValueError:
+                        errors.append(f"{label}: createdAt is not an ISO date: {item['createdAt']}")
+
+            check_requirement(label, item.get('requirement'), errors)
+
+    return errors
+
+
+def to_firestore(kind, item):
+    """Source definition → stored form (dates as timestamps, empty optionals dropped)"""
+    doc = {key: value for key, value in item.items() if value is not None}
+    if 'requirement' in doc:
+        doc['requirement'] = {key: value for key, value in doc['requirement'].items() if value is not None}
+    if kind == 'missions':
+        created_at = datetime.fromisoformat(doc['createdAt'])
+        doc['createdAt'] = created_at if created_at.tzinfo else created_at.replace(tzinfo=timezone.utc)
+    return doc
+
+
+def item_hashes(config):
+    """{'badges/first_word': hash, ...} used to diff versions without re-reading collections"""
+    return {f"{kind}/{item['id']}": digest(item) for kind in KINDS for item in config[kind]}
+
+
+def read_pointer(db):
+    snapshot = db.collection(POINTER_COLLECTION).document(POINTER_DOC).get()
+    return snapshot.to_dict() if snapshot.exists else None
+
+
+def list_versions(db):
+    """Published versions (without their content), oldest first"""
+    fields = ['version', 'contentHash', 'publishedAt', 'badgeCount', 'missionCount', 'sizeBytes']
+    docs = db.collection(VERSION_COLLECTION).select(fields).get()
+    return sorted((doc.to_dict() for doc in docs), key=lambda version: version['version'])
+
+
+def read_version(db, version):
+    snapshot = db.collection(VERSION_COLLECTION).document(f"v{version}").get()
+    return snapshot.to_dict() if snapshot.exists else None
+
+
+def existing_item_hashes(db):
+    """First publish: every document already in the legacy collections, with unknown content"""
+    hashes = {}
+    for kind, collection in KINDS.items():
+        for doc in db.collection(collection).select([]).get():
+            hashes[f"{kind}/{doc.id}"] = None
+    return hashes
+
+
+def collection_writes(db, old_hashes, new_hashes, items):
+    """Set changed/added definitions and delete removed ones in the legacy collections: (writes, kept keys)
+
+    A None hash means the document wasn't published by this script, so it is
+    only deleted with PRUNE_COLLECTIONS.
+    """
+    writes, kept = [], []
+    for key, item_hash in new_hashes.items():
+        if old_hashes.get(key) != item_hash:
+            kind, item_id = key.split('/', 1)
+            writes.append(('set', db.collection(KINDS[kind]).document(item_id), items[key]))
+    for key, item_hash in old_hashes.items():
+        if key not in new_hashes:
+            if item_hash is None and not PRUNE_COLLECTIONS:
+                kept.append(key)
+                continue
+            kind, item_id = key.split('/', 1)
+            writes.append(('delete', db.collection(KINDS[kind]).document(item_id), None))
+    return writes, kept
+
+
+def print_kept(kept):
+    """Existing documents left alone because they aren't in any published version"""
+    if kept:
+        print(f"   ⚠️  Keeping {len(kept)} existing documents not in {SOURCE_FILE} "
+              f"(set PRUNE_COLLECTIONS to delete them):")
+        for key in sorted(kept):
+            print(f"     - {key}")
+
+
+def pointer_doc(version_doc):
+    return {
+        'version': version_doc['version'],
+        'contentHash': version_doc['contentHash'],
+        'badgeCount': version_doc['badgeCount'],
+        'missionCount': version_doc['missionCount'],
+        'sizeBytes': version_doc['sizeBytes'],
+        'updatedAt': datetime.now(timezone.utc).isoformat()
+    }
+
+
+def commit_writes(db, writes):
+    """Batched commits in order; the pointer is the last write, so clients never see a half-published version"""
+    for i in range(0, len(writes), BATCH_LIMIT):
+        commit_batch(db, writes[i:i + BATCH_LIMIT])
+
+
+def print_cost_report(reads, writes, bundle_bytes, item_count):
+    """Cost of this publish, and per-load client reads before/after the bundle"""
+    sets = sum(1 for method, _, _ in writes if method != 'delete')
+    deletes = len(writes) - sets
+    publish_cost = (reads * READ_PRICE + sets * WRITE_PRICE + deletes * DELETE_PRICE) / 100_000
+
+    # Collections: one read per badge and mission. Bundle: pointer read, plus the
+    # bundle itself only when the cached version is stale
+    daily_before = CLIENT_LOADS_PER_DAY * item_count
+    daily_after = CLIENT_LOADS_PER_DAY
+    saved = (daily_before - daily_after) * READ_PRICE / 100_000
+
+    print(f"\n💰 Cost report:")
+    print(f"   This run:           {reads} reads, {sets} writes, {deletes} deletes (${publish_cost:.6f})")
+    print(f"   Bundle size:        {bundle_bytes / 1024:.1f} KB of {MAX_DOCUMENT_BYTES / 1024:.0f} KB")
+    print(f"   Reads per app load: {item_count} (collections) → 1 (cached) / 2 (new version)")
+    print(f"   At {CLIENT_LOADS_PER_DAY:,} loads/day: {daily_before:,} → ~{daily_after:,} reads "
+          f"(~${saved:.2f}/day saved)")
+
+
+def publish(db):
+    """Validate the source file and publish it as a new version"""
+    print(f"\n🎖️  Publishing {SOURCE_FILE}...")
+    print(f"   Mode: {'DRY RUN' if DRY_RUN else 'LIVE'}")
+
+    with open(SOURCE_FILE, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    errors = validate_config(config)
+    if errors:
+        print(f"\n❌ {len(errors)} problems in {SOURCE_FILE}:")
+        for error in errors:
+            print(f"   - {error}")
+        return
+
+    content_hash = digest({kind: config[kind] for kind in KINDS})
+    pointer = read_pointer(db)
+    reads = 1
+
+    if pointer and pointer['contentHash'] == content_hash:
+        print(f"\n✅ Unchanged since v{pointer['version']} ({content_hash}), nothing to publish\n")
+        return
+
+    versions = list_versions(db)
+    reads += max(len(versions), 1)
+    version = max((v['version'] for v in versions), default=0) + 1
+
+    items = {f"{kind}/{item['id']}": to_firestore(kind, item) for kind in KINDS for item in config[kind]}
+    hashes = item_hashes(config)
+    version_doc = {
+        'version': version,
+        'contentHash': content_hash,
+        'badges': [items[f"badges/{item['id']}"] for item in config['badges']],
+        'missions': [items[f"missions/{item['id']}"] for item in config['missions']],
+        'itemHashes': hashes,
+        'badgeCount': len(config['badges']),
+        'missionCount': len(config['missions']),
+        'publishedAt': datetime.now(timezone.utc).isoformat()
+    }
+    version_doc['sizeBytes'] = len(json.dumps(version_doc, default=str, ensure_ascii=False).encode('utf-8'))
+
+    if version_doc['sizeBytes'] > MAX_DOCUMENT_BYTES:
+        print(f"\n❌ Bundle is {version_doc['sizeBytes']:,} bytes, over the {MAX_DOCUMENT_BYTES:,} byte limit")
+        return
+
+    writes = [('set', db.collection(VERSION_COLLECTION).document(f"v{version}"), version_doc)]
+
+    if SYNC_COLLECTIONS:
+        if pointer:
+            previous = read_version(db, pointer['version'])
+            old_hashes = previous['itemHashes'] if previous else existing_item_hashes(db)
+            reads += 1
+        else:
+            old_hashes = existing_item_hashes(db)
+            reads += max(len(old_hashes), 1)
+        sync_writes, kept = collection_writes(db, old_hashes, hashes, items)
+        writes += sync_writes
+        print_kept(kept)
+
+    writes.append(('set', db.collection(POINTER_COLLECTION).document(POINTER_DOC), pointer_doc(version_doc)))
+
+    previous_label = f"v{pointer['version']}" if pointer else 'nothing'
+    print(f"   {previous_label} → v{version}: {version_doc['badgeCount']} badges, "
+          f"{version_doc['missionCount']} missions ({content_hash})")
+
+    if DRY_RUN:
+        for method, ref, _ in writes:
+            print(f"   [DRY] {method:6s} {ref.parent.id}/{ref.id}")
+    else:
+        commit_writes(db, writes)
+        print(f"   ✅ Published v{version}")
+
+    print_cost_report(reads, writes, version_doc['sizeBytes'], version_doc['badgeCount'] + version_doc['missionCount'])
+
+
+def rollback(db):
+    """Point clients back at an earlier version (and restore the legacy collections)"""
+    print(f"\n⏪ Rolling back gamification config...")
+    print(f"   Mode: {'DRY RUN' if DRY_RUN else 'LIVE'}")
+
+    pointer = read_pointer(db)
+    if not pointer:
+        print("   ❌ Nothing published yet")
+        return
+
+    target = ROLLBACK_VERSION
+    if target is None:
+        older = [v['version'] for v in list_versions(db) if v['version'] < pointer['version']]
+        if not older:
+            print(f"   ❌ No version older than v{pointer['version']}")
+            return
+        target = max(older)
+
+    if target == pointer['version']:
+        print(f"   ✅ Already on v{target}")
+        return
+
+    version_doc = read_version(db, target)
+    if not version_doc:
+        print(f"   ❌ v{target} not found in {VERSION_COLLECTION}")
+        return
+
+    writes = []
+    if SYNC_COLLECTIONS:
+        current = read_version(db, pointer['version'])
+        old_hashes = current['itemHashes'] if current else existing_item_hashes(db)
+        items = {f"{kind}/{item['id']}": item for kind in KINDS for item in version_doc[kind]}
+        sync_writes, kept = collection_writes(db, old_hashes, version_doc['itemHashes'], items)
+        writes += sync_writes
+        print_kept(kept)
+    writes.append(('set', db.collection(POINTER_COLLECTION).document(POINTER_DOC), pointer_doc(version_doc)))
+
+    print(f"   v{pointer['version']} → v{target}: {version_doc['badgeCount']} badges, "
+          f"{version_doc['missionCount']} missions ({len(writes) - 1} collection writes)")
+
+    if DRY_RUN:
+        for method, ref, _ in writes:
+            print(f"   [DRY] {method:6s} {ref.parent.id}/{ref.id}")
+    else:
+        commit_writes(db, writes)
+        print(f"   ✅ Clients now get v{target}")
+
+
+def show_versions(db):
+    pointer = read_pointer(db)
+    print(f"\n📜 Published versions:")
+    for version in list_versions(db):
+        marker = '👉' if pointer and version['version'] == pointer['version'] else '  '
+        print(f"   {marker} v{version['version']:<4d} {version['publishedAt'][:19]}  "
+              f"{version['badgeCount']:3d} badges  {version['missionCount']:3d} missions  "
+              f"{version['sizeBytes'] / 1024:6.1f} KB  {version['contentHash']}")
+
+
+def main():
+    """Main function"""
+    print("="*70)
+    print("🎖️  Gamification Config: badges + missions → Firebase")
+    print("="*70)
+
+    if MODE != 'list':
+        if DRY_RUN:
+            print("\n⚠️  DRY RUN MODE\n")
+        else:
+            print("\n🚀 LIVE MODE")
+            response = input("   Continue? (yes/no): ")
+            if response.lower() != 'yes':
+                return
+
+    db = initialize_firebase()
+    if not db:
+        return
+
+    if MODE == 'rollback':
+        rollback(db)
+    elif MODE == 'list':
+        show_versions(db)
+    else:
+        publish(db)
+
+    print("\n✅ Gamification config complete!\n")
+
+
+if __name__ == '__main__':
+    main()
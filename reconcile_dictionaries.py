@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Reconcile Firebase dictionaries collection ↔ Cambridge Vocabulary CSV
+
+Confirms that Firestore still matches the CSV after manual console edits
+or partial runs of update_audio_urls.py. Nothing is written to Firestore.
+
+Reports:
+- missing:      word in CSV, no document in Firestore
+- extra:        document in Firestore, word not in CSV
+- stale:        document exists but its content differs from the CSV
+- id mismatch:  document ID doesn't follow make_word_id() (e.g. 'ice-cream'
+                stored under a legacy ID that kept the '-')
+
+How it stays cheap at 100k+ documents:
+- Remote reads are field-masked to the fields parse_csv_row() produces
+  (timestamps and imageUrl excluded), fetched in pages of PAGE_SIZE; audio
+  metadata from process_audio.py is stripped before comparing
+- The collection is split with a partition query and the partitions are
+  scanned in parallel, each with its own start_after() cursor
+- Each document is reduced to a 16-byte hash of its canonical JSON; only
+  the CSV-side hashes are held in memory, and issues are streamed to
+  REPORT_FILE instead of being collected
+
+Usage:
+    python3 reconcile_dictionaries.py
+
+    # Against the local emulator
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python3 reconcile_dictionaries.py
+"""
+
+import csv
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from firebase_admin import firestore
+from migrate_perfect_to_firebase import CSV_FILE, initialize_firebase, iter_pages, make_word_id, parse_csv_row
+
+# Configuration
+COLLECTION = 'dictionaries'
+PAGE_SIZE = 500  # Documents per field-masked page
+PARTITION_COUNT = 8  # Parallel cursors over the collection
+REPORT_FILE = 'reconcile_report.txt'
+MAX_PRINTED = 5  # Examples shown per issue type
+
+# Set on every write, so never part of the comparison
+VOLATILE_FIELDS = {'addedDate', 'lastUpdated'}
+
+# Filled by process_images.py (the CSV always has ''), so not compared
+POST_PROCESSING_FIELDS = {'imageUrl'}
+
+# Added under pronunciation.<accent> by process_audio.py
+AUDIO_METADATA_FIELDS = ('durationMs', 'peakDb')
+
+ISSUE_TYPES = ['missing', 'extra', 'stale', 'id_mismatch']
+
+
+def canonical_hash(doc, fields):
+    """Hash the compared fields of a document in canonical (sorted, compact) JSON form"""
+    canonical = json.dumps(
+        {field: doc.get(field) for field in fields},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(',', ':'),
+        default=str
+    )
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).digest()
+
+
+def strip_post_processing(data):
+    """Undo what the post-processing stages write, so a document compares like its CSV row"""
+    for pronunciation in (data.get('pronunciation') or {}).values():
+        if not isinstance(pronunciation, dict):
+            continue
+        for field in AUDIO_METADATA_FIELDS:
+            pronunciation.pop(field, None)
+        # Uploaded processed clip: the CSV URL is kept in sourceAudioUrl
+        if 'sourceAudioUrl' in pronunciation:
+            pronunciation['audioUrl'] = pronunciation.pop('sourceAudioUrl')
+    return data
+
+
+def load_expected():
+    """Hash every CSV row as it would be uploaded: {word_id: (digest, word)}"""
+    expected = {}
+    fields = None
+    duplicates = []
+
+    with open(CSV_FILE, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+
+        for row in reader:
+            word_id, doc = parse_csv_row(row)
+            if fields is None:
+                fields = sorted(set(doc) - VOLATILE_FIELDS - POST_PROCESSING_FIELDS)
+
+            if word_id in expected:
+                duplicates.append(word_id)
+            expected[word_id] = (canonical_hash(doc, fields), doc['british'])
+
+    return expected, fields, duplicates
+
+
+def partition_queries(db):
+    """Split the collection into independent cursor ranges"""
+    try:
+        partitions = list(db.collection_group(COLLECTION).get_partitions(PARTITION_COUNT))
+        print(f"   Partitions: {len(partitions)}")
+        return [partition.query() for partition in partitions]
+    except Exception as e:
+        print(f"   ⚠️  Partition query unavailable ({e}), using a single cursor")
+        return [db.collection(COLLECTION).order_by(firestore.FieldPath.document_id())]
+
+
+class DriftReport:
+    """Thread-safe issue counter that streams every issue to REPORT_FILE"""
+
+    def __init__(self, report_file):
+        self.lock = threading.Lock()
+        self.counts = {issue: 0 for issue in ISSUE_TYPES}
+        self.examples = {issue: [] for issue in ISSUE_TYPES}
+        self.scanned = 0
+        self.matched = 0
+        self.file = report_file
+
+    def add(self, issue, word_id, detail):
+        with self.lock:
+            self.counts[issue] += 1
+            if len(self.examples[issue]) < MAX_PRINTED:
+                self.examples[issue].append(f"{word_id} ({detail})")
+            self.file.write(f"{issue}\t{word_id}\t{detail}\n")
+
+
+def scan_partition(query, fields, expected, report):
+    """Compare every document in one partition against the CSV hashes"""
+    for page in iter_pages(query, fields, PAGE_SIZE):
+        for snapshot in page:
+            compare_document(snapshot, fields, expected, report)
+
+
+def compare_document(snapshot, fields, expected, report):
+    """Classify one remote document as in sync, stale, extra or ID-mismatched"""
+    # Collection group queries also match nested 'dictionaries' collections
+    if snapshot.reference.parent.parent is not None:
+        return
+
+    doc_id = snapshot.id
+    data = snapshot.to_dict() or {}
+    word = data.get('british') or data.get('word') or ''
+    rule_id = make_word_id(word)
+
+    if data.get('wordId') != doc_id or rule_id != doc_id:
+        report.add('id_mismatch', doc_id, f"wordId={data.get('wordId')!r}, expected {rule_id!r}")
+    else:
+        with report.lock:
+            entry = expected.pop(doc_id, None)
+
+        if entry is None:
+            report.add('extra', doc_id, word)
+        elif entry[0] != canonical_hash(strip_post_processing(data), fields):
+            report.add('stale', doc_id, entry[1])
+        else:
+            with report.lock:
+                report.matched += 1
+
+    with report.lock:
+        report.scanned += 1
+        if report.scanned % 1000 == 0:
+            print(f"   Scanned {report.scanned} documents...")
+
+
+def reconcile(db):
+    """Stream the dictionaries collection and report drift against the CSV"""
+    print(f"\n🔎 Reconciling '{COLLECTION}' against CSV...")
+    print(f"   CSV: {CSV_FILE}")
+
+    expected, fields, duplicates = load_expected()
+    total_expected = len(expected)
+    print(f"   CSV words: {total_expected}")
+    print(f"   Compared fields: {len(fields)}")
+
+    if duplicates:
+        print(f"   ⚠️  {len(duplicates)} CSV rows share a word ID (last row wins): {', '.join(duplicates[:MAX_PRINTED])}")
+
+    queries = partition_queries(db)
+    start = time.time()
+
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        f.write("issue\twordId\tdetail\n")
+        report = DriftReport(f)
+
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            futures = [executor.submit(scan_partition, query, fields, expected, report) for query in queries]
+            for future in futures:
+                future.result()
+
+        # Whatever was never popped has no document in Firestore
+        for word_id, (_, word) in expected.items():
+            report.add('missing', word_id, word)
+
+    elapsed = time.time() - start
+
+    print(f"\n{'='*70}")
+    print(f"📊 Reconcile Summary:")
+    print(f"   📝 CSV words:          {total_expected}")
+    print(f"   📄 Documents scanned:  {report.scanned}")
+    print(f"   ✅ In sync:            {report.matched}")
+    print(f"   ❌ Missing:            {report.counts['missing']}")
+    print(f"   ➕ Extra:              {report.counts['extra']}")
+    print(f"   🕰️  Stale:              {report.counts['stale']}")
+    print(f"   🔀 ID mismatch:        {report.counts['id_mismatch']}")
+    print(f"   ⏱️  {elapsed:.1f}s ({report.scanned / elapsed if elapsed else 0:.0f} docs/sec)")
+
+    for issue in ISSUE_TYPES:
+        if report.examples[issue]:
+            print(f"\n   {issue}:")
+            for example in report.examples[issue]:
+                print(f"     - {example}")
+
+    print(f"{'='*70}\n")
+
+    in_sync = not any(report.counts.values())
+    if not in_sync:
+        print(f"  📄 Full list exported to: {REPORT_FILE}\n")
+
+    return in_sync
+
+
+def main():
+    """Main function"""
+    print("="*70)
+    print("🔎 Drift Check: Firebase dictionaries ↔ Cambridge Vocabulary CSV")
+    print("="*70)
+
+    db = initialize_firebase()
+    if not db:
+        return
+
+    if reconcile(db):
+        print("✅ Firestore matches the CSV!\n")
+    else:
+        print("💡 Next steps:")
+        print("   1. Review the issues above")
+        print("   2. Missing/stale: re-run migrate_perfect_to_firebase.py")
+        print("   3. Extra/ID mismatch: delete or rename the documents in the console\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Weekly XP Reset Job (userLevels)
+
+Server-side replacement for LeaderboardService.resetWeeklyXP(), which loads
+every userLevels document on the device and puts all updates in one batch
+(fails past 500 users).
+
+Steps:
+1. Snapshot last week's final top-N standings into
+   leaderboardArchive/{weekId} (only once per week)
+2. Stream userLevels page by page (field mask: weeklyXP only) and reset
+   non-zero weeklyXP with parallel batches of BATCH_LIMIT writes, stamping
+   lastUpdated so incremental leaderboard runs pick the reset up
+3. After every page, checkpoint the cursor in the archive document
+
+Safe to re-run:
+- A week whose archive is 'complete' is skipped
+- An interrupted run resumes after the last checkpointed document, and
+  users already at 0 XP are never rewritten
+- Users deleted between the page read and the commit are skipped and
+  counted, without failing the rest of their batch
+
+Run after the week has ended (e.g. Monday 00:05); WEEK_ID defaults to the
+previous ISO week.
+
+Usage:
+    python3 reset_weekly_xp.py
+
+    # Against the local emulator
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python3 reset_weekly_xp.py
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from firebase_admin import firestore
+from migrate_perfect_to_firebase import BATCH_LIMIT, commit_updates, initialize_firebase, iter_pages
+
+# Configuration
+COLLECTION = 'userLevels'
+ARCHIVE_COLLECTION = 'leaderboardArchive'
+WEEK_ID = None  # e.g. '2025-W45'; None = previous ISO week
+TOP_N = 100  # Standings kept in the archive (matches the app's leaderboard)
+PAGE_SIZE = 2000  # Documents read per page
+WRITE_WORKERS = 8  # Parallel batch commits
+DRY_RUN = True  # Set to False to write
+
+# Fields copied into the archived standings
+STANDINGS_FIELDS = ['username', 'avatar', 'weeklyXP', 'currentLevel']
+
+
+def previous_week_id():
+    """ISO week ID (e.g. '2025-W45') of the week before today"""
+    year, week, _ = (datetime.now() - timedelta(days=7)).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def snapshot_standings(db, archive_ref, week_id):
+    """Archive the final top-N weekly standings before anything is reset"""
+    print(f"\n📸 Snapshotting top {TOP_N} standings for {week_id}...")
+
+    snapshot = (db.collection(COLLECTION)
+                .order_by('weeklyXP', direction=firestore.Query.DESCENDING)
+                .limit(TOP_N)
+                .select(STANDINGS_FIELDS)
+                .stream())
+
+    standings = []
+    for doc in snapshot:
+        data = doc.to_dict()
+        if not data.get('weeklyXP'):
+            break
+        standings.append({
+            'rank': len(standings) + 1,
+            'userId': doc.id,
+            'username': data.get('username', 'User'),
+            'avatar': data.get('avatar', '👤'),
+            'xp': data['weeklyXP'],
+            'level': data.get('currentLevel', 1)
+        })
+
+    state = {
+        'weekId': week_id,
+        'status': 'snapshotted',
+        'standings': standings,
+        'snapshotAt': datetime.now().isoformat(),
+        'resetCursor': None,
+        'resetCount': 0,
+        'skippedCount': 0
+    }
+
+    if DRY_RUN:
+        print(f"   [DRY] Would archive {len(standings)} entries")
+    else:
+        archive_ref.set(state)
+        print(f"   ✅ Archived {len(standings)} entries")
+
+    for entry in standings[:3]:
+        print(f"   #{entry['rank']} {entry['username']}: {entry['xp']} XP")
+
+    return state
+
+
+def checkpoint(archive_ref, state, futures, last_id):
+    """Wait for one page's batches, then record how far the reset got"""
+    for future in futures:
+        written, missing = future.result()
+        state['resetCount'] += written
+        state['skippedCount'] = state.get('skippedCount', 0) + len(missing)
+    state['resetCursor'] = last_id
+    state['status'] = 'resetting'
+
+    if not DRY_RUN:
+        archive_ref.update({
+            'status': state['status'],
+            'resetCursor': last_id,
+            'resetCount': state['resetCount'],
+            'skippedCount': state.get('skippedCount', 0)
+        })
+
+
+def reset_weekly_xp(db, archive_ref, state):
+    """Stream userLevels and zero weeklyXP with parallel chunked batches"""
+    print(f"\n🔄 Resetting weeklyXP...")
+    print(f"   Mode: {'DRY RUN (reads only)' if DRY_RUN else 'LIVE'}")
+
+    collection = db.collection(COLLECTION)
+    query = collection.order_by(firestore.FieldPath.document_id())
+
+    # Cursor from the document reference, so it works even if that user was deleted since
+    start_doc = None
+    if state['resetCursor']:
+        print(f"   ⏩ Resuming after {state['resetCursor']} ({state['resetCount']} already reset)")
+        start_doc = {firestore.FieldPath.document_id(): collection.document(state['resetCursor'])}
+
+    scanned = 0
+    would_reset = 0
+    start = time.time()
+    pending = None  # (futures, last_id) of the page still being written
+
+    with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as executor:
+        for page in iter_pages(query, ['weeklyXP'], PAGE_SIZE, start_after=start_doc):
+            scanned += len(page)
+            # lastUpdated lets the incremental leaderboard jobs see the reset
+            writes = [('update', doc.reference, {'weeklyXP': 0, 'lastUpdated': firestore.SERVER_TIMESTAMP})
+                      for doc in page if doc.to_dict().get('weeklyXP')]
+            would_reset += len(writes)
+
+            futures = []
+            if not DRY_RUN:
+                futures = [executor.submit(commit_updates, db, writes[i:i + BATCH_LIMIT])
+                           for i in range(0, len(writes), BATCH_LIMIT)]
+
+            # The next page is read while this one is written
+            if pending:
+                checkpoint(archive_ref, state, *pending)
+            pending = (futures, page[-1].id)
+
+            elapsed = time.time() - start
+            print(f"   Scanned {scanned} users ({scanned / elapsed if elapsed else 0:.0f}/sec)...")
+
+        if pending:
+            checkpoint(archive_ref, state, *pending)
+
+    elapsed = time.time() - start
+
+    if not DRY_RUN:
+        archive_ref.update({
+            'status': 'complete',
+            'resetCount': state['resetCount'],
+            'completedAt': datetime.now().isoformat()
+        })
+
+    print(f"\n{'='*70}")
+    print(f"📊 Weekly Reset Summary ({state['weekId']}):")
+    print(f"   📄 Users scanned:  {scanned}")
+    print(f"   🔄 Reset:          {state['resetCount'] if not DRY_RUN else f'{would_reset} (dry run)'}")
+    print(f"   ⏭️  Already at 0:   {scanned - would_reset}")
+    if state.get('skippedCount'):
+        print(f"   👻 Deleted users:  {state['skippedCount']} (removed since their page was read)")
+    print(f"   ⏱️  {elapsed:.1f}s ({scanned / elapsed if elapsed else 0:.0f} users/sec, "
+          f"{would_reset / elapsed if elapsed else 0:.0f} writes/sec)")
+    print(f"{'='*70}\n")
+
+
+def main():
+    """Main function"""
+    print("="*70)
+    print("🏆 Weekly XP Reset: userLevels")
+    print("="*70)
+
+    week_id = WEEK_ID or previous_week_id()
+    print(f"\n   Week: {week_id}")
+
+    if DRY_RUN:
+        print("\n⚠️  DRY RUN MODE\n")
+    else:
+        print("\n🚀 LIVE MODE")
+        response = input("   Continue? (yes/no): ")
+        if response.lower() != 'yes':
+            return
+
+    db = initialize_firebase()
+    if not db:
+        return
+
+    archive_ref = db.collection(ARCHIVE_COLLECTION).document(week_id)
+    archive = archive_ref.get()
+    state = archive.to_dict() if archive.exists else None
+
+    if state and state['status'] == 'complete':
+        print(f"\n✅ {week_id} already reset ({state['resetCount']} users), nothing to do\n")
+        return
+
+    if state is None:
+        state = snapshot_standings(db, archive_ref, week_id)
+
+    reset_weekly_xp(db, archive_ref, state)
+
+    print("✅ Weekly reset complete!\n")
+
+
+if __name__ == '__main__':
+    main()
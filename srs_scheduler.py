@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Batch Spaced-Repetition Scheduler (flashcard_progress → dueQueues)
+
+Same SM-2 rules as SpacedRepetitionService.calculateNextReview() in the app,
+but vectorized with NumPy over every learner's cards at once.
+
+For each user it publishes dueQueues/{userId}:
+- due:      word IDs due today (most overdue first, max MAX_DUE_PER_USER)
+- dueCount: total cards due today
+- forecast: reviews per day for the next FORECAST_DAYS days, assuming every
+            review is answered 'Good' (re-reviews inside the window count)
+
+Modes:
+- 'publish':   read flashcard_progress (field-masked pages) and write queues
+- 'benchmark': parity check against the Swift formula, then throughput on
+               BENCHMARK_CARDS synthetic cards
+
+Usage:
+    python3 srs_scheduler.py
+
+    # Against the local emulator
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python3 srs_scheduler.py
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from firebase_admin import firestore
+from migrate_perfect_to_firebase import BATCH_LIMIT, commit_batch, initialize_firebase, iter_pages
+
+# Configuration
+MODE = 'publish'  # 'publish' or 'benchmark'
+PROGRESS_COLLECTION = 'flashcard_progress'  # Written by FlashcardViewModel
+QUEUE_COLLECTION = 'dueQueues'
+PAGE_SIZE = 2000
+FORECAST_DAYS = 14
+MAX_DUE_PER_USER = 200  # Word IDs stored per queue document
+UTC_OFFSET_HOURS = 7  # Learners' day boundary (Vietnam, no DST)
+WRITE_WORKERS = 8
+BENCHMARK_CARDS = 5_000_000
+BENCHMARK_USERS = 50_000
+DRY_RUN = True  # Set to False to publish
+
+# SM-2 constants (SpacedRepetitionService)
+MIN_EASE = 1.3
+MAX_EASE = 2.5
+AGAIN, HARD, GOOD, EASY = 0, 1, 2, 3
+
+PROGRESS_FIELDS = ['userId', 'wordId', 'easeFactor', 'interval', 'nextReviewDate']
+
+
+def next_review(ease, interval, quality):
+    """Vectorized calculateNextReview(): returns (new ease factors, new intervals in days)"""
+    ease = np.asarray(ease, dtype=np.float64)
+    interval = np.asarray(interval, dtype=np.int64)
+    quality = np.broadcast_to(np.asarray(quality, dtype=np.int64), interval.shape)
+
+    # EF' = EF + (0.1 - (2 - q) * (0.08 + (2 - q) * 0.02)), clamped to [1.3, 2.5]
+    q = 2.0 - quality
+    new_ease = np.clip(ease + (0.1 - q * (0.08 + q * 0.02)), MIN_EASE, MAX_EASE)
+
+    # Int(Double) in Swift truncates toward zero
+    hard = np.maximum(3, np.trunc(interval * 1.2).astype(np.int64))
+    good = np.where(interval == 0, 1,
+                    np.where(interval == 1, 6, np.trunc(interval * new_ease).astype(np.int64)))
+    easy = np.where(interval == 0, 4, np.trunc(interval * new_ease * 1.3).astype(np.int64))
+
+    new_interval = np.select(
+        [quality == AGAIN, quality == HARD, quality == GOOD],
+        [np.ones_like(interval), hard, good],
+        easy
+    )
+    return new_ease, new_interval
+
+
+def next_review_reference(ease_factor, interval, quality):
+    """Line-by-line port of the Swift function, used for the parity check"""
+    quality_factor = float(quality)
+    ease_factor = ease_factor + (0.1 - (2.0 - quality_factor) * (0.08 + (2.0 - quality_factor) * 0.02))
+    ease_factor = max(1.3, min(2.5, ease_factor))
+
+    current_interval = interval
+    if quality == 0:
+        interval = 1
+    elif quality == 1:
+        interval = max(3, int(float(current_interval) * 1.2))
+    elif quality == 2:
+        if interval == 0:
+            interval = 1
+        elif interval == 1:
+            interval = 6
+        else:
+            interval = int(float(interval) * ease_factor)
+    else:
+        if interval == 0:
+            interval = 4
+        else:
+            interval = int(float(interval) * ease_factor * 1.3)
+
+    return ease_factor, interval
+
+
+def day_index(timestamps):
+    """Learner-local day number for POSIX timestamps (seconds)"""
+    return np.floor((np.asarray(timestamps, dtype=np.float64) + UTC_OFFSET_HOURS * 3600) / 86400).astype(np.int64)
+
+
+def build_queues(user_codes, user_count, due_days, ease, interval, today):
+    """Per-user due cards (indices, most overdue first) and review forecast"""
+    # Due today: one stable sort by (user, due day) groups each user's queue
+    due_mask = due_days <= today
+    due_idx = np.flatnonzero(due_mask)
+    due_idx = due_idx[np.lexsort((due_days[due_idx], user_codes[due_idx]))]
+    due_counts = np.bincount(user_codes[due_idx], minlength=user_count)
+    bounds = np.concatenate([[0], np.cumsum(due_counts)])
+
+    # Forecast: replay 'Good' answers until every card leaves the window
+    forecast = np.zeros(user_count * FORECAST_DAYS, dtype=np.int64)
+    offset = np.maximum(due_days - today, 0)
+    users, ease, interval = user_codes, ease, interval
+
+    while True:
+        active = offset < FORECAST_DAYS
+        if not active.any():
+            break
+        users, offset = users[active], offset[active]
+        forecast += np.bincount(users * FORECAST_DAYS + offset, minlength=len(forecast))
+        ease, interval = next_review(ease[active], interval[active], GOOD)
+        offset = offset + interval
+
+    return due_idx, bounds, forecast.reshape(user_count, FORECAST_DAYS)
+
+
+def load_cards(db):
+    """Stream flashcard_progress into column arrays"""
+    users, words, ease, interval, due = [], [], [], [], []
+    query = db.collection(PROGRESS_COLLECTION).order_by(firestore.FieldPath.document_id())
+
+    for page in iter_pages(query, PROGRESS_FIELDS, PAGE_SIZE):
+        for doc in page:
+            data = doc.to_dict()
+            if not data.get('userId') or not data.get('nextReviewDate'):
+                continue
+            users.append(data['userId'])
+            words.append(data.get('wordId', ''))
+            ease.append(data.get('easeFactor', MAX_EASE))
+            interval.append(data.get('interval', 0))
+            due.append(data['nextReviewDate'].timestamp())
+        print(f"   Read {len(users)} cards...")
+
+    user_ids, user_codes = np.unique(np.array(users, dtype=np.str_), return_inverse=True)
+    return {
+        'user_ids': user_ids,
+        'user_codes': user_codes.astype(np.int64),
+        'word_ids': np.array(words, dtype=np.str_),
+        # Clamped so bad stored values can't stall the forecast (a negative interval never grows)
+        'ease': np.clip(np.array(ease, dtype=np.float64), MIN_EASE, MAX_EASE),
+        'interval': np.maximum(np.array(interval, dtype=np.int64), 0),
+        'due_days': day_index(due)
+    }
+
+
+def publish_queues(db):
+    """Compute and write one dueQueues document per learner"""
+    print(f"\n🗂️  Building due queues...")
+    print(f"   Mode: {'DRY RUN' if DRY_RUN else 'LIVE'}")
+
+    start = time.time()
+    cards = load_cards(db)
+    user_count = len(cards['user_ids'])
+    print(f"   Cards: {len(cards['word_ids'])}, learners: {user_count}")
+
+    now = datetime.now(timezone.utc)
+    today = int(day_index([now.timestamp()])[0])
+    local_date = (now + timedelta(hours=UTC_OFFSET_HOURS)).date().isoformat()
+
+    compute_start = time.time()
+    due_idx, bounds, forecast = build_queues(
+        cards['user_codes'], user_count, cards['due_days'], cards['ease'], cards['interval'], today
+    )
+    compute_time = time.time() - compute_start
+
+    writes = []
+    for code, user_id in enumerate(cards['user_ids']):
+        queue = due_idx[bounds[code]:bounds[code + 1]]
+        writes.append(('set', db.collection(QUEUE_COLLECTION).document(str(user_id)), {
+            'userId': str(user_id),
+            'date': local_date,
+            'due': cards['word_ids'][queue[:MAX_DUE_PER_USER]].tolist(),
+            'dueCount': int(len(queue)),
+            'forecast': forecast[code].tolist(),
+            'updatedAt': now.isoformat()
+        }))
+
+    if DRY_RUN:
+        for _, ref, doc in writes[:3]:
+            print(f"   [DRY] {ref.id}: {doc['dueCount']} due, next {FORECAST_DAYS} days {doc['forecast']}")
+    else:
+        with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as executor:
+            chunks = [writes[i:i + BATCH_LIMIT] for i in range(0, len(writes), BATCH_LIMIT)]
+            list(executor.map(lambda chunk: commit_batch(db, chunk), chunks))
+
+    print(f"\n{'='*70}")
+    print(f"📊 Due Queue Summary ({local_date}):")
+    print(f"   👥 Learners:         {user_count}")
+    print(f"   🃏 Cards due today:  {len(due_idx)}")
+    print(f"   ✍️  Queues written:   {len(writes) if not DRY_RUN else 'N/A (Dry Run)'}")
+    print(f"   ⏱️  {time.time() - start:.1f}s total, {compute_time * 1000:.0f} ms scheduling")
+    print(f"{'='*70}\n")
+
+
+def check_parity():
+    """Vectorized next_review() must match the Swift formula on every input"""
+    ease = np.round(np.arange(1.3, 2.51, 0.01), 2)
+    interval = np.arange(0, 400)
+    grid_ease, grid_interval, grid_quality = (a.ravel() for a in np.meshgrid(ease, interval, [0, 1, 2, 3]))
+
+    new_ease, new_interval = next_review(grid_ease, grid_interval, grid_quality)
+    mismatches = 0
+    for e, i, q, vec_e, vec_i in zip(grid_ease, grid_interval, grid_quality, new_ease, new_interval):
+        ref_e, ref_i = next_review_reference(float(e), int(i), int(q))
+        if ref_i != vec_i or abs(ref_e - vec_e) > 1e-12:
+            mismatches += 1
+
+    print(f"   Parity: {len(grid_ease)} (ease, interval, quality) cases, {mismatches} mismatches "
+          f"{'✅' if mismatches == 0 else '❌'}")
+    return mismatches == 0
+
+
+def run_benchmark():
+    """Parity check, then scheduling throughput on synthetic cards"""
+    print(f"\n⏱️  Benchmark: {BENCHMARK_CARDS:,} cards, {BENCHMARK_USERS:,} learners")
+    if not check_parity():
+        return
+
+    rng = np.random.default_rng(42)
+    user_codes = np.sort(rng.integers(0, BENCHMARK_USERS, BENCHMARK_CARDS))
+    ease = rng.uniform(MIN_EASE, MAX_EASE, BENCHMARK_CARDS)
+    interval = rng.choice([0, 1, 3, 6, 15, 40, 100], BENCHMARK_CARDS)
+    quality = rng.integers(0, 4, BENCHMARK_CARDS)
+    today = 20000
+    due_days = today + rng.integers(-10, 60, BENCHMARK_CARDS)
+
+    start = time.time()
+    next_review(ease, interval, quality)
+    elapsed = time.time() - start
+    print(f"   next_review:  {elapsed * 1000:.0f} ms ({BENCHMARK_CARDS / elapsed:,.0f} cards/sec)")
+
+    start = time.time()
+    due_idx, _, forecast = build_queues(user_codes, BENCHMARK_USERS, due_days, ease, interval, today)
+    elapsed = time.time() - start
+    print(f"   Due queues + {FORECAST_DAYS}-day forecast: {elapsed * 1000:.0f} ms "
+          f"({BENCHMARK_CARDS / elapsed:,.0f} cards/sec, {len(due_idx):,} due, "
+          f"{int(forecast.sum()):,} forecast reviews)")
+
+
+def main():
+    """Main function"""
+    print("="*70)
+    print("🧠 SM-2 Scheduler: flashcard_progress → dueQueues")
+    print("="*70)
+
+    if MODE == 'benchmark':
+        run_benchmark()
+        return
+
+    db = initialize_firebase()
+    if not db:
+        return
+
+    publish_queues(db)
+
+    print("✅ Due queues complete!\n")
+
+
+if __name__ == '__main__':
+    main()
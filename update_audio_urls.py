@@ -15,6 +15,7 @@ import csv
 import firebase_admin
 from firebase_admin import credentials, firestore
 from datetime import datetime
+from migrate_perfect_to_firebase import make_word_id
 
 # Configuration
 CSV_FILE = 'Cambridge_Vocabulary_2018_with_audio.csv'
@@ -108,8 +109,8 @@ def update_audio_urls(db):
                     skipped_count += 1
                     continue
 
-                # Create word ID (same as migration script)
-                word_id = word_british.lower().replace(' ', '_').replace("'", '')
+                # Create word ID (same rule as migration script, incl. '-' → '_')
+                word_id = make_word_id(word_british)
 
                 # Determine accent
                 accent = determine_accent(audio_url)
@@ -10,10 +10,12 @@ Usage:
 
 import csv
 import re
+import time
 from collections import defaultdict
 
 # Configuration
 CSV_FILE = 'Cambridge_Vocabulary_2018_PERFECT.csv'
+BENCHMARK = False  # Set to True to time the example check against the old heuristic
 
 # Fields that should be filled by N8N
 AI_FIELDS = [
@@ -30,6 +32,40 @@ AI_FIELDS = [
     'exampleFlyersVi'
 ]
 
+EXAMPLE_FIELDS = ['exampleStarters', 'exampleMovers', 'exampleFlyers']
+
+# Forms the suffix rules can't produce; irregular plurals come from the irregular_plural column
+IRREGULAR_FORMS = {
+    # Verbs ("he's", "it's" tokenize to 'he', 'it', so they can't count for 'be')
+    'be': ['am', 'is', 'are', 'was', 'were', 'been', 'being', "i'm", "you're", "we're", "they're",
+           "isn't", "aren't", "wasn't", "weren't"],
+    'have': ['has', 'had', "haven't", "hasn't"], 'do': ['does', 'did', 'done', "don't", "doesn't", "didn't"],
+    'can': ['could', "can't", 'cannot'], 'will': ['would', "won't"], 'shall': ['should'], 'may': ['might'],
+    'go': ['goes', 'went', 'gone'], 'come': ['came'], 'get': ['got', 'gotten'], 'give': ['gave', 'given'],
+    'see': ['saw', 'seen'], 'eat': ['ate', 'eaten'], 'drink': ['drank', 'drunk'], 'take': ['took', 'taken'],
+    'make': ['made'], 'say': ['said'], 'know': ['knew', 'known'], 'think': ['thought'], 'buy': ['bought'],
+    'bring': ['brought'], 'catch': ['caught'], 'teach': ['taught'], 'find': ['found'], 'feel': ['felt'],
+    'sleep': ['slept'], 'swim': ['swam', 'swum'], 'run': ['ran'], 'sit': ['sat'], 'stand': ['stood'],
+    'write': ['wrote', 'written'], 'ride': ['rode', 'ridden'], 'fly': ['flew', 'flown'],
+    'draw': ['drew', 'drawn'], 'sing': ['sang', 'sung'], 'begin': ['began', 'begun'],
+    'break': ['broke', 'broken'], 'choose': ['chose', 'chosen'], 'drive': ['drove', 'driven'],
+    'fall': ['fell', 'fallen'], 'forget': ['forgot', 'forgotten'], 'hear': ['heard'], 'hold': ['held'],
+    'keep': ['kept'], 'leave': ['left'], 'lose': ['lost'], 'meet': ['met'], 'pay': ['paid'],
+    'send': ['sent'], 'sell': ['sold'], 'speak': ['spoke', 'spoken'], 'spend': ['spent'],
+    'steal': ['stole', 'stolen'], 'tell': ['told'], 'throw': ['threw', 'thrown'],
+    'understand': ['understood'], 'wake': ['woke', 'woken'], 'wear': ['wore', 'worn'], 'win': ['won'],
+    'hide': ['hid', 'hidden'], 'lie': ['lay', 'lain'], 'feed': ['fed'], 'grow': ['grew', 'grown'],
+    'blow': ['blew', 'blown'], 'build': ['built'], 'dig': ['dug'], 'dream': ['dreamt'],
+    'fight': ['fought'], 'hang': ['hung'], 'mean': ['meant'], 'shine': ['shone'], 'show': ['shown'],
+    'become': ['became'], 'bite': ['bit', 'bitten'], 'learn': ['learnt'], 'spell': ['spelt'],
+    'smell': ['smelt'], 'burn': ['burnt'], 'light': ['lit'], 'find out': ['found out'],
+    # Adjectives / determiners
+    'good': ['better', 'best'], 'bad': ['worse', 'worst'], 'far': ['further', 'farther', 'furthest', 'farthest'],
+    'little': ['less', 'least'], 'many': ['more', 'most'], 'much': ['more', 'most']
+}
+
+VOWELS = 'aeiou'
+
 
 def validate_ipa(ipa_string):
     """Check if IPA notation is valid"""
@@ -49,7 +85,7 @@ def validate_ipa(ipa_string):
 
 
 def validate_example_uses_word(example, word):
-    """Check if example sentence uses the target word"""
+    """Old substring heuristic (kept for the BENCHMARK comparison only)"""
     if not example or not word:
         return True  # Skip empty examples
 
@@ -66,6 +102,221 @@ def validate_example_uses_word(example, word):
             word_lower + 'es' in example_lower)
 
 
+def tokenize(text):
+    """Lowercase word tokens; hyphenated words split, trailing 's dropped"""
+    text = text.lower().replace('\u2019', "'")
+    return [token[:-2] if token.endswith("'s") else token
+            for token in re.findall(r"[a-z0-9]+(?:['.][a-z0-9]+)*", text)]
+
+
+def headword_variants(word):
+    """Plain spellings of a CSV headword: 'sweet(s)' → sweet, sweets; 'television / TV' → both"""
+    # Optional words: 'have [got] to'
+    optional = re.search(r"\s*\[([^\]]*)\]", word)
+    if optional:
+        without = word[:optional.start()] + word[optional.end():]
+        with_words = word[:optional.start()] + ' ' + optional.group(1) + word[optional.end():]
+        return headword_variants(without) + headword_variants(with_words)
+
+    # Optional suffixes glued to the word: sweet(s), blond(e), chemist('s)
+    word = re.sub(r"(\w)\(([^)\s]*)\)", r"\1{\2}", word)
+    # Glosses: 'bat (sports)', 'where (a ... b)'
+    word = re.sub(r"\s*\([^)]*\)", '', word)
+    word = word.split('...')[0]
+
+    parts = [part.strip() for part in word.split('/') if part.strip()]
+    variants = []
+    for part in parts:
+        # 'take a photo / picture' → 'take a picture'
+        if variants and len(part.split()) == 1 and len(parts[0].split()) > 1:
+            part = ' '.join(parts[0].split()[:-1] + [part])
+        match = re.search(r"\{([^}]*)\}", part)
+        if match:
+            variants.append(part[:match.start()] + part[match.end():])
+            variants.append(part[:match.start()] + match.group(1) + part[match.end():])
+        else:
+            variants.append(part)
+    return variants
+
+
+def word_inflections(word):
+    """Regular plural / 3rd person, past, -ing and comparative forms of one word"""
+    forms = {word}
+    forms.update(IRREGULAR_FORMS.get(word, []))
+
+    if len(word) < 2 or not word.isalpha():
+        return forms
+
+    consonant_y = word.endswith('y') and word[-2] not in VOWELS
+    # Short CVC words double the last consonant: stop → stopped, big → bigger, quiz → quizzed
+    cvc = (len(word) >= 3 and word[-1] not in VOWELS + 'wxy' and word[-2] in VOWELS
+           and (word[-3] not in VOWELS or word[-3:-1] == 'ui' and word[-4:-3] == 'q'))
+
+    # -s / -es
+    forms.add(word + 's')
+    if word.endswith(('s', 'x', 'z', 'ch', 'sh', 'o')):
+        forms.add(word + 'es')
+    if consonant_y:
+        forms.add(word[:-1] + 'ies')
+    if word.endswith('f'):
+        forms.add(word[:-1] + 'ves')
+    if word.endswith('fe'):
+        forms.add(word[:-2] + 'ves')
+
+    # -ed, -ing, -er, -est
+    if word.endswith('ie'):
+        forms.add(word[:-2] + 'ying')
+    for suffix in ('ed', 'ing', 'er', 'est'):
+        if not word.endswith('e'):
+            forms.add(word + suffix)
+        elif suffix != 'ing':
+            forms.add(word + suffix[1:])  # like → liked, agree → agreed
+        elif not word.endswith('ie'):
+            forms.add(word + suffix if word.endswith(('ee', 'ye', 'oe')) else word[:-1] + suffix)
+        if cvc:
+            forms.add(word + word[-1] + suffix)
+        if consonant_y and suffix != 'ing':
+            forms.add(word[:-1] + 'i' + suffix)
+
+    return forms
+
+
+def phrase_inflections(phrase):
+    """Token tuples for a headword phrase; the first and last words are inflected"""
+    tokens = tokenize(phrase)
+    if not tokens:
+        return set()
+
+    irregular = [tokenize(form) for form in IRREGULAR_FORMS.get(' '.join(tokens), [])]
+    if len(tokens) == 1:
+        return {(form,) for form in word_inflections(tokens[0])} | {tuple(t) for t in irregular}
+
+    # 'take a photo' → 'took a photo'; 'ice cream' → 'ice creams'
+    phrases = {tuple(t) for t in irregular}
+    phrases.update((form,) + tuple(tokens[1:]) for form in word_inflections(tokens[0]))
+    phrases.update(tuple(tokens[:-1]) + (form,) for form in word_inflections(tokens[-1]))
+    return phrases
+
+
+def build_inflection_index(rows):
+    """Compile every headword's forms once: ({token tuple: {row index}}, {first token: longest phrase})"""
+    index = defaultdict(set)
+
+    for idx, row in enumerate(rows):
+        for column in ('british', 'american'):
+            for variant in headword_variants(row[column].strip()):
+                for phrase in phrase_inflections(variant):
+                    index[phrase].add(idx)
+
+        # children, feet, ... (taken as written, not inflected further)
+        for variant in headword_variants((row.get('irregular_plural') or '').strip()):
+            phrase = tuple(tokenize(variant))
+            if phrase:
+                index[phrase].add(idx)
+
+    # Only phrases starting with a token are tried at that token
+    max_len = {}
+    for phrase in index:
+        max_len[phrase[0]] = max(max_len.get(phrase[0], 0), len(phrase))
+    return dict(index), max_len
+
+
+def headwords_in_sentence(sentence, index, max_len):
+    """All headwords used in a sentence, in one pass over its tokens"""
+    tokens = tokenize(sentence)
+    found = set()
+
+    for start, token in enumerate(tokens):
+        longest = max_len.get(token, 0)
+        if longest == 1:
+            found |= index[(token,)]
+            continue
+        for end in range(start + 1, min(start + longest, len(tokens)) + 1):
+            rows = index.get(tuple(tokens[start:end]))
+            if rows:
+                found |= rows
+
+    return found
+
+
+def benchmark_example_checks(rows, index, max_len):
+    """Time the indexed example check against the old substring heuristic"""
+    checks = [(idx, row['british'].strip(), row.get(field, '').strip())
+              for idx, row in enumerate(rows) for field in EXAMPLE_FIELDS]
+    checks = [check for check in checks if check[2]]
+
+    start = time.perf_counter()
+    old_flags = {(idx, example) for idx, word, example in checks if not validate_example_uses_word(example, word)}
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_flags = {(idx, example) for idx, word, example in checks
+                 if idx not in headwords_in_sentence(example, index, max_len)}
+    new_time = time.perf_counter() - start
+
+    print("⏱️  Example check benchmark:")
+    print(f"   Sentences:          {len(checks)}")
+    print(f"   Old heuristic:      {old_time * 1000:7.1f} ms, {len(old_flags)} flagged")
+    print(f"   Inflection index:   {new_time * 1000:7.1f} ms, {len(new_flags)} flagged")
+    print(f"   Only old flags:     {len(old_flags - new_flags)} (missed inflections)")
+    print(f"   Only index flags:   {len(new_flags - old_flags)} (substring false matches)")
+    for idx, example in sorted(new_flags - old_flags)[:5]:
+        print(f"     - {rows[idx]['british'].strip()}: '{example}'")
+    print()
+
+
+def validate_row(idx, row, inflection_index, max_phrase_len):
+    """All issues for one CSV row (idx is the 1-based line number used in messages)"""
+    word = row['british'].strip()
+    row_issues = {'missing': [], 'ipa': [], 'examples': [], 'translation': [], 'definition': []}
+
+    # Check completeness
+    for field in AI_FIELDS:
+        if not row.get(field, '').strip():
+            row_issues['missing'].append(f"Line {idx} ({word}): Missing {field}")
+
+    # Validate IPA format
+    ipa_gb = row.get('ipaGB', '').strip()
+    ipa_us = row.get('ipaUS', '').strip()
+
+    if ipa_gb and not validate_ipa(ipa_gb):
+        row_issues['ipa'].append(f"Line {idx} ({word}): ipaGB invalid format: {ipa_gb}")
+
+    if ipa_us and not validate_ipa(ipa_us):
+        row_issues['ipa'].append(f"Line {idx} ({word}): ipaUS invalid format: {ipa_us}")
+
+    # Validate examples use the word (or one of its inflections)
+    for field_name in EXAMPLE_FIELDS:
+        example = row.get(field_name, '').strip()
+        if example and idx - 1 not in headwords_in_sentence(example, inflection_index, max_phrase_len):
+            row_issues['examples'].append(
+                f"Line {idx} ({word}): {field_name} doesn't use word: '{example}'"
+            )
+
+    # Check translation not empty or same as word
+    translation = row.get('translationVi', '').strip()
+    if translation and translation.lower() == word.lower():
+        row_issues['translation'].append(
+            f"Line {idx} ({word}): translationVi same as English word"
+        )
+
+    # Check definitions not too short
+    def_en = row.get('definitionEn', '').strip()
+    def_vi = row.get('definitionVi', '').strip()
+
+    if def_en and len(def_en.split()) < 5:
+        row_issues['definition'].append(
+            f"Line {idx} ({word}): definitionEn too short ({len(def_en.split())} words)"
+        )
+
+    if def_vi and len(def_vi.split()) < 5:
+        row_issues['definition'].append(
+            f"Line {idx} ({word}): definitionVi too short ({len(def_vi.split())} words)"
+        )
+
+    return row_issues
+
+
 def validate_csv():
     """Main validation function"""
 
@@ -86,63 +337,29 @@ def validate_csv():
     definition_issues = []
 
     with open(CSV_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-
-        for idx, row in enumerate(reader, 1):
-            total += 1
-            word = row['british'].strip()
-
-            # Check completeness
-            for field in AI_FIELDS:
-                value = row.get(field, '').strip()
-                if value:
-                    stats[field] += 1
-                else:
-                    issues.append(f"Line {idx} ({word}): Missing {field}")
-
-            # Validate IPA format
-            ipa_gb = row.get('ipaGB', '').strip()
-            ipa_us = row.get('ipaUS', '').strip()
-
-            if ipa_gb and not validate_ipa(ipa_gb):
-                ipa_format_issues.append(f"Line {idx} ({word}): ipaGB invalid format: {ipa_gb}")
-
-            if ipa_us and not validate_ipa(ipa_us):
-                ipa_format_issues.append(f"Line {idx} ({word}): ipaUS invalid format: {ipa_us}")
-
-            # Validate examples use the word
-            examples = [
-                ('exampleStarters', row.get('exampleStarters', '').strip()),
-                ('exampleMovers', row.get('exampleMovers', '').strip()),
-                ('exampleFlyers', row.get('exampleFlyers', '').strip())
-            ]
-
-            for field_name, example in examples:
-                if example and not validate_example_uses_word(example, word):
-                    example_word_issues.append(
-                        f"Line {idx} ({word}): {field_name} doesn't use word: '{example}'"
-                    )
-
-            # Check translation not empty or same as word
-            translation = row.get('translationVi', '').strip()
-            if translation and translation.lower() == word.lower():
-                translation_issues.append(
-                    f"Line {idx} ({word}): translationVi same as English word"
-                )
-
-            # Check definitions not too short
-            def_en = row.get('definitionEn', '').strip()
-            def_vi = row.get('definitionVi', '').strip()
-
-            if def_en and len(def_en.split()) < 5:
-                definition_issues.append(
-                    f"Line {idx} ({word}): definitionEn too short ({len(def_en.split())} words)"
-                )
-
-            if def_vi and len(def_vi.split()) < 5:
-                definition_issues.append(
-                    f"Line {idx} ({word}): definitionVi too short ({len(def_vi.split())} words)"
-                )
+        rows = list(csv.DictReader(f))
+
+    # Inflections of every headword, built once per run
+    start = time.perf_counter()
+    inflection_index, max_phrase_len = build_inflection_index(rows)
+    print(f"🔤 Inflection index: {len(inflection_index)} forms in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    if BENCHMARK:
+        benchmark_example_checks(rows, inflection_index, max_phrase_len)
+
+    for idx, row in enumerate(rows, 1):
+        total += 1
+
+        for field in AI_FIELDS:
+            if row.get(field, '').strip():
+                stats[field] += 1
+
+        row_issues = validate_row(idx, row, inflection_index, max_phrase_len)
+        issues.extend(row_issues['missing'])
+        ipa_format_issues.extend(row_issues['ipa'])
+        example_word_issues.extend(row_issues['examples'])
+        translation_issues.extend(row_issues['translation'])
+        definition_issues.extend(row_issues['definition'])
 
     # Print results
     print(f"📈 Data Completeness (Total: {total} words):\n")
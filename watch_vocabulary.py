@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Watch Mode: validate (and optionally sync) vocabulary CSV edits as you save
+
+Replaces the save → validate_perfect_csv.py → flip DRY_RUN →
+migrate_perfect_to_firebase.py loop, where every step re-reads everything.
+
+On each save (debounced):
+1. Re-parse the CSV and diff it against the previous parse held in memory
+2. Re-validate only the added/changed rows (validate_perfect_csv.validate_row)
+3. If SYNC is on, write only those words (and delete removed ones) to
+   Firestore, or to the local emulator when FIRESTORE_EMULATOR_HOST is set.
+   Existing words are merged, so imageUrl/imageVariants (process_images.py)
+   and audio metadata (process_audio.py) survive unless the clip changed.
+   A save that removes more than MAX_REMOVALS words deletes nothing: it is
+   most likely a half-written file, and is checked again on the next save
+
+Uses inotify when the optional inotify_simple package is installed,
+otherwise polls the file's mtime/size every POLL_INTERVAL seconds.
+
+Usage:
+    python3 watch_vocabulary.py
+
+    # Sync edits to the local emulator
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python3 watch_vocabulary.py
+"""
+
+import csv
+import os
+import time
+from firebase_admin import firestore
+from migrate_perfect_to_firebase import BATCH_LIMIT, CSV_FILE, initialize_firebase, make_word_id, parse_csv_row
+from validate_perfect_csv import build_inflection_index, validate_row
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+# Configuration
+WATCH_FILES = [CSV_FILE]
+DEBOUNCE_SECONDS = 0.15  # Quiet time after the last write before reacting
+POLL_INTERVAL = 0.1  # Used when inotify isn't available
+SYNC = False  # Set to True to push changed words to Firestore / the emulator
+MAX_REMOVALS = 10  # More removed words than this in one save aren't deleted (e.g. a file cut off mid-save)
+MAX_PRINTED = 5  # Issues shown per change
+
+
+def file_signature(path):
+    """(mtime, size) of a file, or None while it doesn't exist (e.g. mid-save)"""
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except FileNotFoundError:
+        return None
+
+
+def parse_file(path):
+    """Rows of a CSV keyed by word ID: {word_id: (line, row)}; the last duplicate wins"""
+    with open(path, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    # DictReader fills the columns of a short (e.g. half-written) row with None
+    for line, row in enumerate(rows, 1):
+        if None in row.values():
+            raise csv.Error(f"line {line} has missing columns")
+
+    return rows, {make_word_id(row['british']): (line, row) for line, row in enumerate(rows, 1)}
+
+
+def load_state(path):
+    """Initial parse of one watched file"""
+    rows, by_id = parse_file(path)
+    index, max_len = build_inflection_index(rows)
+    return {
+        'path': path,
+        'rows': by_id,
+        'headwords': [(row['british'], row['american'], row['irregular_plural']) for row in rows],
+        'index': index,
+        'max_len': max_len
+    }
+
+
+def sync_data(row, old_row):
+    """CSV fields of one word, leaving the fields the post-processing stages own alone"""
+    doc = parse_csv_row(row)[1]
+    if old_row is None:
+        return doc
+
+    previous = parse_csv_row(old_row)[1]
+    doc.pop('imageUrl')
+    for accent, pronunciation in doc['pronunciation'].items():
+        if pronunciation['audioUrl'] == previous['pronunciation'][accent]['audioUrl']:
+            # May point at the processed clip uploaded by process_audio.py
+            del pronunciation['audioUrl']
+        else:
+            # New clip: the old metadata no longer applies until process_audio.py re-runs
+            for field in ('sourceAudioUrl', 'durationMs', 'peakDb'):
+                pronunciation[field] = firestore.DELETE_FIELD
+    return doc
+
+
+def apply_change(state, db):
+    """Diff the file against the last parse, re-validate and sync only what changed"""
+    start = time.perf_counter()
+    try:
+        rows, by_id = parse_file(state['path'])
+    except (OSError, csv.Error, KeyError) as e:
+        print(f"   ⚠️  Can't parse {state['path']} yet ({e}), waiting for the next save")
+        return
+
+    old = state['rows']
+    changed = [word_id for word_id, (_, row) in by_id.items()
+               if word_id not in old or old[word_id][1] != row]
+    removed = [word_id for word_id in old if word_id not in by_id]
+
+    # Keep held-back words in the state, so they're compared again on the next save
+    held = []
+    if SYNC and db and len(removed) > MAX_REMOVALS:
+        held, removed = removed, []
+
+    # The inflection index is keyed by row position, so rebuild it only if headwords (or plurals) moved
+    headwords = [(row['british'], row['american'], row['irregular_plural']) for row in rows]
+    if headwords != state['headwords']:
+        state['index'], state['max_len'] = build_inflection_index(rows)
+        state['headwords'] = headwords
+
+    state['rows'] = {**by_id, **{word_id: old[word_id] for word_id in held}}
+
+    if not changed and not removed and not held:
+        return
+
+    issues = []
+    for word_id in changed:
+        line, row = by_id[word_id]
+        row_issues = validate_row(line, row, state['index'], state['max_len'])
+        issues.extend(issue for kind in row_issues.values() for issue in kind)
+    validated = time.perf_counter()
+
+    print(f"\n📝 {os.path.basename(state['path'])}: {len(changed)} changed, {len(removed)} removed")
+    if held:
+        print(f"   ⚠️  {len(held)} words missing (over MAX_REMOVALS), not deleting them "
+              f"(reconcile_dictionaries.py lists them as extra; raise MAX_REMOVALS to sync the deletes)")
+    for word_id in (changed + removed)[:MAX_PRINTED]:
+        print(f"   {'-' if word_id in removed else '~'} {word_id}")
+
+    if issues:
+        print(f"   ⚠️  {len(issues)} issues:")
+        for issue in issues[:MAX_PRINTED]:
+            print(f"     - {issue}")
+        if len(issues) > MAX_PRINTED:
+            print(f"     ... and {len(issues) - MAX_PRINTED} more")
+    else:
+        print("   ✅ Valid")
+
+    if SYNC and db:
+        collection = db.collection('dictionaries')
+        writes = [(collection.document(word_id), sync_data(by_id[word_id][1], old[word_id][1] if word_id in old else None))
+                  for word_id in changed]
+        writes += [(collection.document(word_id), None) for word_id in removed]
+        for i in range(0, len(writes), BATCH_LIMIT):
+            # Merge, not commit_batch's plain set(), so post-processing fields are kept
+            batch = db.batch()
+            for ref, data in writes[i:i + BATCH_LIMIT]:
+                if data is None:
+                    batch.delete(ref)
+                else:
+                    batch.set(ref, data, merge=True)
+            batch.commit()
+        print(f"   ☁️  Synced {len(writes)} words")
+
+    done = time.perf_counter()
+    print(f"   ⚡ Validated in {(validated - start) * 1000:.0f} ms"
+          f"{f', synced in {(done - validated) * 1000:.0f} ms' if SYNC and db else ''}")
+
+
+def watch_inotify(paths):
+    """Yield sets of changed paths using inotify (watches directories, so atomic renames count)"""
+    inotify = INotify()
+    watched = {}
+    for directory in {os.path.dirname(path) for path in paths}:
+        wd = inotify.add_watch(directory, flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE)
+        watched[wd] = directory
+
+    def changed_paths(events):
+        return {os.path.join(watched[event.wd], event.name) for event in events} & set(paths)
+
+    while True:
+        changed = changed_paths(inotify.read())
+        if not changed:
+            continue
+
+        # Debounce: editors often write a file in several steps
+        while True:
+            events = inotify.read(timeout=int(DEBOUNCE_SECONDS * 1000))
+            if not events:
+                break
+            changed |= changed_paths(events)
+
+        yield changed
+
+
+def watch_polling(paths):
+    """Yield sets of changed paths by polling mtime/size"""
+    signatures = {path: file_signature(path) for path in paths}
+
+    while True:
+        time.sleep(POLL_INTERVAL)
+        changed = {path for path in paths if file_signature(path) != signatures[path]}
+        if not changed:
+            continue
+
+        # Debounce: wait until the file stops changing
+        while True:
+            current = {path: file_signature(path) for path in paths}
+            time.sleep(DEBOUNCE_SECONDS)
+            if all(file_signature(path) == current[path] for path in paths):
+                break
+
+        changed = {path for path in paths if current[path] != signatures[path]}
+        signatures = current
+        yield changed
+
+
+def main():
+    """Main function"""
+    print("="*70)
+    print("👀 Watch Mode: vocabulary CSV → validate" + (" → Firebase" if SYNC else ""))
+    print("="*70)
+
+    paths = [os.path.abspath(path) for path in WATCH_FILES]
+
+    db = None
+    if SYNC:
+        db = initialize_firebase()
+        if not db:
+            return
+
+    states = {}
+    for path in paths:
+        states[path] = load_state(path)
+        print(f"   Watching {os.path.basename(path)} ({len(states[path]['rows'])} words)")
+
+    watcher = watch_inotify(paths) if INotify else watch_polling(paths)
+    print(f"   Using {'inotify' if INotify else f'polling every {POLL_INTERVAL}s'}, Ctrl+C to stop\n")
+
+    try:
+        for changed in watcher:
+            for path in changed:
+                apply_change(states[path], db)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching\n")
+
+
+if __name__ == '__main__':
+    main()